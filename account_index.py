@@ -0,0 +1,86 @@
+"""Persistent domain → Salesforce ACCOUNT_ID index.
+
+Resolving a domain in Snowflake needs a leading-wildcard scan of the whole
+Contact table, yet the same client domains come back every week.  This
+SQLite file (stored next to ``token.json``) remembers both hits and misses
+for ``ACCOUNT_INDEX_TTL_DAYS`` so only new or stale domains reach Snowflake.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+
+import config
+
+_lock = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(config.ACCOUNT_INDEX_PATH, timeout=30)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS domain_account (
+            domain      TEXT PRIMARY KEY,
+            account_id  TEXT,
+            resolved_at REAL NOT NULL
+        )
+        """
+    )
+    return conn
+
+
+def lookup_many(domains: Iterable[str]) -> dict[str, str | None]:
+    """Return fresh index entries for *domains*.
+
+    Only domains with an unexpired entry are present in the result; a value
+    of None is a cached negative (the domain has no account).
+    """
+    domains = sorted({d.lower() for d in domains})
+    if not domains:
+        return {}
+    cutoff = time.time() - config.ACCOUNT_INDEX_TTL_DAYS * 86400
+    placeholders = ", ".join("?" for _ in domains)
+    with _lock, _connect() as conn:
+        rows = conn.execute(
+            f"SELECT domain, account_id FROM domain_account "
+            f"WHERE domain IN ({placeholders}) AND resolved_at >= ?",
+            [*domains, cutoff],
+        ).fetchall()
+    return dict(rows)
+
+
+def lookup(domain: str) -> tuple[bool, str | None]:
+    """Return ``(hit, account_id)`` for a single domain."""
+    found = lookup_many([domain])
+    domain = domain.lower()
+    return domain in found, found.get(domain)
+
+
+def store_many(resolved: dict[str, str | None]) -> None:
+    """Record resolution results (None = no account) for the given domains."""
+    if not resolved:
+        return
+    now = time.time()
+    with _lock, _connect() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO domain_account (domain, account_id, resolved_at) VALUES (?, ?, ?)",
+            [(d.lower(), aid, now) for d, aid in resolved.items()],
+        )
+
+
+def rebuild(resolved: dict[str, str]) -> None:
+    """Replace every positive entry with a fresh full extraction.
+
+    Cached negatives are kept unless the extraction now resolves them; they
+    still expire with the normal TTL.
+    """
+    now = time.time()
+    with _lock, _connect() as conn:
+        conn.execute("DELETE FROM domain_account WHERE account_id IS NOT NULL")
+        conn.executemany(
+            "INSERT OR REPLACE INTO domain_account (domain, account_id, resolved_at) VALUES (?, ?, ?)",
+            [(d.lower(), aid, now) for d, aid in resolved.items()],
+        )
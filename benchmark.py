@@ -0,0 +1,686 @@
+#!/usr/bin/env python3
+"""Offline benchmark for the weekly prep pipeline.
+
+Runs the real orchestration code (``main``) against local stand-ins for
+every backend — Google Calendar/Gmail/Docs behind ``build_service``, the
+Snowflake connection behind ``snowflake_client._get_conn`` and the Bedrock
+client at ``summarizer.client`` — so pipeline and client changes can be
+measured without network access or credentials.
+
+Each stand-in sleeps for a latency drawn from a log-normal distribution
+(given as median / p95 per call type, scaled by ``--latency-scale``) and
+can inject throttling (``--throttle-rate``: Google 429s, Bedrock 429s,
+Snowflake queueing delay) or hard failures (``--error-rate``).  The
+configured Bedrock, Gmail and Docs quotas are lifted so results measure the
+pipeline; ``--quotas`` enforces them, compressed by the latency scale.
+
+Run:
+    python benchmark.py                          # 10, 50, 200 and 500 meeting weeks
+    python benchmark.py --meetings 50 --latency-scale 0.2
+    python benchmark.py --throttle-rate 0.05     # exercise retry/backoff paths
+    python benchmark.py --quotas                 # also hold to the configured API quotas
+    python benchmark.py --save-baseline          # record results as the new baseline
+    python benchmark.py -- --delta-followups     # extra flags passed through to main.py
+
+Results are compared with ``bench_baselines.json``; a scenario whose wall
+time grows beyond ``--tolerance`` or whose backend call counts go up is
+reported as a regression (exit status 1).
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import anthropic
+import httplib2
+import httpx
+from googleapiclient.errors import HttpError
+from snowflake.connector.errors import ProgrammingError
+
+import calendar_client
+import config
+import doc_rotation
+import docs_client
+import gmail_client
+import google_auth
+import main
+import rate_limit
+import snowflake_client
+import summarizer
+import tracing
+
+BASELINES_PATH = os.path.join(config.BASE_DIR, "bench_baselines.json")
+
+# (median_ms, p95_ms) per call type, before --latency-scale
+DEFAULT_LATENCIES = {
+    "calendar.list": (150, 400),
+    "calendar.get": (120, 300),
+    "gmail.list": (250, 700),
+    "gmail.batch": (400, 1200),
+    "snowflake.query": (800, 2500),
+    "bedrock.create": (6000, 14000),
+    "docs.get": (200, 500),
+    "docs.batchUpdate": (400, 1000),
+}
+
+# Multiplier that takes every configured quota out of the way
+_UNLIMITED_QUOTA = 1e9
+
+# Share of attendee domains with no CRM account (prospects)
+_UNKNOWN_DOMAIN_RATE = 0.1
+
+
+# ---------------------------------------------------------------------------
+# Latency / fault injection
+# ---------------------------------------------------------------------------
+
+class Backend:
+    """Latency sampling, fault injection and call counting shared by the fakes."""
+
+    def __init__(self, latencies: dict, scale: float, throttle_rate: float, error_rate: float, seed: int):
+        self.latencies = latencies
+        self.scale = scale
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.calls: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _roll(self) -> tuple[float, float]:
+        with self._lock:
+            return self._rng.random(), self._rng.gauss(0, 1)
+
+    def delay(self, op: str) -> float:
+        """Sampled latency in seconds for one *op* call."""
+        median_ms, p95_ms = self.latencies[op]
+        sigma = math.log(max(p95_ms, median_ms) / median_ms) / 1.645 if median_ms else 0.0
+        _, z = self._roll()
+        return median_ms * math.exp(sigma * z) * self.scale / 1000
+
+    def call(self, op: str, wait: bool = True) -> str | None:
+        """Count (and unless not *wait*, sleep for) one *op* call.
+
+        Returns "throttle", "error" or None.
+        """
+        with self._lock:
+            self.calls[op] += 1
+        if wait:
+            time.sleep(self.delay(op))
+        roll, _ = self._roll()
+        if roll < self.error_rate:
+            return "error"
+        if roll < self.error_rate + self.throttle_rate:
+            return "throttle"
+        return None
+
+
+def _http_error(status: int) -> HttpError:
+    return HttpError(httplib2.Response({"status": status}), b'{"error": {"message": "injected by benchmark"}}')
+
+
+def _raise_not_found():
+    raise _http_error(404)
+
+
+# ---------------------------------------------------------------------------
+# Synthetic week
+# ---------------------------------------------------------------------------
+
+class World:
+    """A deterministic synthetic week: accounts, meetings, mail and CRM rows."""
+
+    def __init__(self, n_meetings: int, seed: int):
+        rng = random.Random(seed)
+        n_accounts = max(1, n_meetings // 2)
+        self.accounts = {
+            f"client{i}.example": (None if rng.random() < _UNKNOWN_DOMAIN_RATE else f"001BENCH{i:07d}")
+            for i in range(n_accounts)
+        }
+        domains = list(self.accounts)
+
+        monday = datetime.fromisoformat(calendar_client._next_week_bounds()[0].rstrip("Z"))
+        self.events = []
+        for n in range(n_meetings):
+            domain = rng.choice(domains)
+            start = monday + timedelta(days=rng.randrange(5), hours=9 + rng.randrange(8))
+            attendees = [{"email": f"rep@{config.COMPANY_DOMAIN}", "displayName": "Rep"}]
+            attendees += [
+                {"email": f"person{j}@{domain}", "displayName": f"Person {j}"}
+                for j in rng.sample(range(6), rng.randint(1, 3))
+            ]
+            self.events.append({
+                "id": f"evt{n:05d}",
+                "status": "confirmed",
+                "summary": f"{domain.split('.')[0].title()} sync #{n}",
+                "start": {"dateTime": start.isoformat() + "Z"},
+                "end": {"dateTime": (start + timedelta(minutes=30)).isoformat() + "Z"},
+                "attendees": attendees,
+            })
+
+    @staticmethod
+    def threads_for(email: str) -> list[str]:
+        """Three threads per address, one of them shared by the whole domain
+        (which is all a bare-domain search finds)."""
+        if "@" not in email:
+            return [f"{email}-shared"]
+        local, domain = email.split("@")
+        return [f"{domain}-shared", f"{email}-a", f"{email}-b"]
+
+
+# ---------------------------------------------------------------------------
+# Google fakes (Calendar, Gmail, Docs)
+# ---------------------------------------------------------------------------
+
+class _Request:
+    def __init__(self, backend: Backend, op: str, result):
+        self._backend = backend
+        self._op = op
+        self._result = result
+
+    def execute(self):
+        fault = self._backend.call(self._op)
+        if fault == "throttle":
+            raise _http_error(429)
+        if fault == "error":
+            raise _http_error(500)
+        return self._result() if callable(self._result) else self._result
+
+
+class _Batch:
+    def __init__(self, backend: Backend, callback):
+        self._backend = backend
+        self._callback = callback
+        self._requests: list[tuple[str, _Request]] = []
+
+    def add(self, request: _Request, request_id: str) -> None:
+        self._requests.append((request_id, request))
+
+    def execute(self) -> None:
+        fault = self._backend.call("gmail.batch")
+        if fault == "error":
+            raise _http_error(500)
+        for request_id, request in self._requests:
+            # Gmail reports per-call throttling inside a successful batch
+            roll, _ = self._backend._roll()
+            if roll < self._backend.throttle_rate:
+                self._callback(request_id, None, _http_error(429))
+            else:
+                self._callback(request_id, request._result(), None)
+
+
+class FakeCalendar:
+    def __init__(self, backend: Backend, world: World):
+        self._backend = backend
+        self._world = world
+
+    def events(self):
+        return self
+
+    def list(self, calendarId, pageToken=None, maxResults=250, updatedMin=None, **_):
+        start = int(pageToken or 0)
+        events = [] if updatedMin else self._world.events
+        page = {"items": events[start:start + maxResults]}
+        if start + maxResults < len(events):
+            page["nextPageToken"] = str(start + maxResults)
+        return _Request(self._backend, "calendar.list", page)
+
+    def get(self, calendarId, eventId):
+        event = next((e for e in self._world.events if e["id"] == eventId), None)
+        if event is None:
+            return _Request(self._backend, "calendar.get", _raise_not_found)
+        return _Request(self._backend, "calendar.get", event)
+
+
+class FakeGmail:
+    def __init__(self, backend: Backend):
+        self._backend = backend
+
+    def users(self):
+        return self
+
+    def threads(self):
+        return self
+
+    def list(self, userId, q, maxResults=100):
+        emails = re.findall(r"from:(\S+)", q)
+        ids = list(dict.fromkeys(tid for e in emails for tid in World.threads_for(e)))
+        return _Request(self._backend, "gmail.list", {"threads": [{"id": t} for t in ids[:maxResults]]})
+
+    def get(self, userId, id, **_):
+        return _Request(self._backend, "gmail.get", lambda: {
+            "messages": [{
+                "snippet": f"Following up on {id} — pricing, renewal timing and next steps.",
+                "payload": {"headers": [
+                    {"name": "Subject", "value": f"Re: {id}"},
+                    {"name": "Date", "value": "Mon, 2 Mar 2026 10:00:00 +0000"},
+                ]},
+            }],
+        })
+
+    def new_batch_http_request(self, callback):
+        return _Batch(self._backend, callback)
+
+
+class FakeDocs:
+    def __init__(self, backend: Backend):
+        self._backend = backend
+        self._length = 1
+        self._lock = threading.Lock()
+
+    def documents(self):
+        return self
+
+    def get(self, documentId, fields=None):
+        def _doc():
+            with self._lock:
+                end = self._length + 1
+            return {
+                "title": "Meeting Prep",
+                "body": {"content": [{"startIndex": 1, "endIndex": end, "paragraph": {"elements": []}}]},
+            }
+        return _Request(self._backend, "docs.get", _doc)
+
+    def batchUpdate(self, documentId, body):
+        def _apply():
+            inserted = sum(len(r["insertText"]["text"]) for r in body["requests"] if "insertText" in r)
+            with self._lock:
+                self._length += inserted
+            return {"replies": []}
+        return _Request(self._backend, "docs.batchUpdate", _apply)
+
+
+# ---------------------------------------------------------------------------
+# Snowflake fake
+# ---------------------------------------------------------------------------
+
+_SELECT_RE = re.compile(r"SELECT\s+(?:DISTINCT\s+)?(.*?)\s+FROM\s+(\S+)", re.S | re.I)
+
+# Rows per account for each table
+_ROWS_PER_ACCOUNT = {
+    "MART_DIM_ACCOUNTS": 1,
+    "MART_DIM_ZUORA_SUBSCRIPTIONS": 3,
+    "OPPORTUNITY": 2,
+    "UPSELL_CLICKS": 4,
+    "MART_DIM_PE_PRODUCT_USAGE_FRONTEND_EVENTS": 6,
+}
+
+
+def _columns(select_list: str) -> list[str]:
+    """Column names of a plain ``a.X, Y AS Z`` select list."""
+    return [
+        re.split(r"\s+AS\s+", expr.strip(), flags=re.I)[-1].split(".")[-1]
+        for expr in select_list.split(",")
+    ]
+
+
+def _value(column: str, aid: str | None, n: int):
+    if column in ("ACCOUNT_ID", "CORPORATION_ID"):
+        return aid
+    if column == "ACCOUNT_NAME":
+        return f"Account {aid}"
+    if column in ("ARR_DOLLARS", "AMOUNT", "COUNT_EVENTS"):
+        return 1000 * (n + 1)
+    if column == "CHURN_SCORE":
+        return 0.2
+    if column.endswith("DATE"):
+        return "2026-03-31"
+    return f"{column.lower()}-{n}"
+
+
+class FakeSnowflakeCursor:
+    def __init__(self, conn: "FakeSnowflakeConnection"):
+        self._conn = conn
+        self.description: list[tuple] = []
+        self._rows: list[tuple] = []
+        self.sfqid: str | None = None
+
+    def _result(self, sql: str, params: dict) -> tuple[list[str], list[tuple]]:
+        match = _SELECT_RE.search(sql)
+        if not match:
+            return [], []  # USE WAREHOUSE / USE DATABASE
+        table = match.group(2).split(".")[-1].upper()
+        accounts = self._conn.world.accounts
+
+        if table == "CONTACT":
+            if "pattern" in params:
+                aid = accounts.get(params["pattern"].split("@")[-1])
+                return ["ACCOUNT_ID"], [(aid,)] if aid else []
+            domains = list(params.values()) if params else list(accounts)
+            return ["DOMAIN", "ACCOUNT_ID"], [(d, accounts[d]) for d in domains if accounts.get(d)]
+
+        columns = _columns(match.group(1))
+        if table == "PRODUCT_2":
+            return columns, [tuple(_value(c, None, n) for c in columns) for n in range(30)]
+
+        aids = [v for v in params.values() if isinstance(v, str) and v.startswith("001")]
+        rows = [
+            tuple(_value(c, aid, n) for c in columns)
+            for aid in aids
+            for n in range(_ROWS_PER_ACCOUNT.get(table, 1))
+        ]
+        return columns, rows
+
+    def execute(self, sql: str, params: dict | None = None):
+        backend = self._conn.backend
+        fault = backend.call("snowflake.query")
+        if fault == "error":
+            raise ProgrammingError("injected by benchmark")
+        if fault == "throttle":
+            # Snowflake queues rather than rejects: pay for a second query's time
+            time.sleep(backend.delay("snowflake.query"))
+        self.sfqid = self._conn.new_query(*self._result(sql, params or {}))
+        self._load(self.sfqid)
+        return self
+
+    def execute_async(self, sql: str, params: dict | None = None):
+        # The latency is paid server-side: the query reports RUNNING until ready
+        backend = self._conn.backend
+        fault = backend.call("snowflake.query", wait=False)
+        if fault == "error":
+            raise ProgrammingError("injected by benchmark")
+        delay = backend.delay("snowflake.query") * (2 if fault == "throttle" else 1)
+        self.sfqid = self._conn.new_query(*self._result(sql, params or {}), ready_in=delay)
+        return {"queryId": self.sfqid}
+
+    def get_results_from_sfqid(self, qid: str) -> None:
+        self._load(qid)
+
+    def _load(self, qid: str) -> None:
+        columns, rows, _ = self._conn.queries[qid]
+        self.description = [(c,) for c in columns]
+        self._rows = rows
+
+    def fetchall(self) -> list[tuple]:
+        return list(self._rows)
+
+    def close(self) -> None:
+        pass
+
+
+class FakeSnowflakeConnection:
+    def __init__(self, backend: Backend, world: World):
+        self.backend = backend
+        self.world = world
+        self.queries: dict[str, tuple[list[str], list[tuple], float]] = {}
+        self._ids = iter(range(1, 1 << 62))
+        self._lock = threading.Lock()
+
+    def new_query(self, columns: list[str], rows: list[tuple], ready_in: float = 0.0) -> str:
+        with self._lock:
+            qid = f"bench-{next(self._ids):08d}"
+            self.queries[qid] = (columns, rows, time.monotonic() + ready_in)
+        return qid
+
+    def cursor(self) -> FakeSnowflakeCursor:
+        return FakeSnowflakeCursor(self)
+
+    def is_closed(self) -> bool:
+        return False
+
+    def get_query_status_throw_if_error(self, qid: str) -> str:
+        return "RUNNING" if time.monotonic() < self.queries[qid][2] else "SUCCESS"
+
+    def is_still_running(self, status: str) -> bool:
+        return status == "RUNNING"
+
+
+# ---------------------------------------------------------------------------
+# Bedrock fake
+# ---------------------------------------------------------------------------
+
+_FAKE_SUMMARY = (
+    "## Account Snapshot\nName: Benchmark Account\n\n"
+    "## Recent Email Activity\n" + "Pricing and renewal discussion. " * 20 + "\n\n"
+    "## Suggested Talking Points\n" + "".join(f"{n}. **Point {n}**: Follow up.\n" for n in range(1, 5))
+)
+
+
+class FakeBedrock:
+    def __init__(self, backend: Backend):
+        self._backend = backend
+        self._warm: set[str] = set()
+        self.messages = self
+
+    def create(self, model, max_tokens, system, messages, **_):
+        fault = self._backend.call("bedrock.create")
+        if fault:
+            status = 429 if fault == "throttle" else 500
+            response = httpx.Response(status, request=httpx.Request("POST", "https://bedrock.benchmark"))
+            error = anthropic.RateLimitError if status == 429 else anthropic.InternalServerError
+            raise error("injected by benchmark", response=response, body=None)
+
+        # Like Bedrock, cache the system prefix up to the last cache_control
+        # breakpoint, and only if it reaches the minimum cacheable length
+        marked = [i for i, block in enumerate(system) if "cache_control" in block]
+        prefix = "".join(block["text"] for block in system[:marked[-1] + 1]) if marked else ""
+        cached_tokens = len(prefix) // 4 if len(prefix) // 4 >= summarizer.MIN_CACHEABLE_TOKENS else 0
+        with self._backend._lock:
+            warm = prefix in self._warm
+            if cached_tokens:
+                self._warm.add(prefix)
+        system_tokens = sum(len(block["text"]) for block in system) // 4
+        return SimpleNamespace(
+            usage=SimpleNamespace(
+                input_tokens=system_tokens - cached_tokens + len(messages[0]["content"]) // 4,
+                output_tokens=min(max_tokens, len(_FAKE_SUMMARY) // 4),
+                cache_read_input_tokens=cached_tokens if warm else 0,
+                cache_creation_input_tokens=0 if warm else cached_tokens,
+            ),
+            content=[SimpleNamespace(text=_FAKE_SUMMARY)],
+        )
+
+
+# ---------------------------------------------------------------------------
+# Running a scenario
+# ---------------------------------------------------------------------------
+
+@contextlib.contextmanager
+def _fakes(backend: Backend, world: World, workdir: str, quotas: bool = False):
+    """Swap every backend (and every on-disk store) for the duration of a run.
+
+    The rate limiter's quotas are lifted unless *quotas*, in which case they
+    are scaled up as much as the latencies are scaled down.
+    """
+    services = {
+        "calendar": FakeCalendar(backend, world),
+        "gmail": FakeGmail(backend),
+        "docs": FakeDocs(backend),
+    }
+    conn = FakeSnowflakeConnection(backend, world)
+
+    def _build_service(api: str, version: str):
+        return services[api]
+
+    patches = [
+        (google_auth, "build_service", _build_service),
+        (snowflake_client, "_get_conn", lambda: conn),
+        (summarizer, "client", FakeBedrock(backend)),
+        (config, "GOOGLE_DOC_ID", "benchmark-doc"),
+        (config, "CALENDAR_SYNC_PATH", os.path.join(workdir, "calendar_sync.json")),
+        (config, "SUMMARY_CACHE_DIR", os.path.join(workdir, "summary_cache")),
+        (config, "RUN_JOURNAL_DIR", os.path.join(workdir, "runs")),
+        (config, "ACCOUNT_INDEX_PATH", os.path.join(workdir, "account_index.sqlite")),
+        (config, "MIRROR_PATH", os.path.join(workdir, "mirror.sqlite")),
+        (config, "PREP_HISTORY_DIR", os.path.join(workdir, "prep_history")),
+        (config, "DOC_ARCHIVE_REGISTRY_PATH", os.path.join(workdir, "doc_archives.json")),
+    ]
+    quota_factor = 1 / backend.scale if quotas else _UNLIMITED_QUOTA
+    patches += [
+        (config, name, getattr(config, name) * quota_factor)
+        for name in (
+            "BEDROCK_REQUESTS_PER_MINUTE",
+            "BEDROCK_TOKENS_PER_MINUTE",
+            "GMAIL_QUOTA_UNITS_PER_SECOND",
+            "DOCS_WRITES_PER_MINUTE",
+        )
+    ]
+    # Modules that imported build_service by name
+    for module in (calendar_client, gmail_client, docs_client, doc_rotation):
+        patches.append((module, "build_service", _build_service))
+
+    saved = [(obj, name, getattr(obj, name)) for obj, name, _ in patches]
+    for obj, name, value in patches:
+        setattr(obj, name, value)
+    # Process-wide caches would otherwise leak between scenarios
+    gmail_client._thread_cache.clear()
+    snowflake_client._account_cache.clear()
+    snowflake_client._catalog = None
+    rate_limit._limiters.clear()
+    try:
+        yield
+    finally:
+        for obj, name, value in saved:
+            setattr(obj, name, value)
+
+
+_STAGES = ("calendar", "snowflake.prefetch", "gather", "summarize", "docs.append", "docs.rotate")
+
+
+def run_scenario(n_meetings: int, opts: argparse.Namespace) -> dict:
+    """Run one synthetic week end to end and return its measurements."""
+    world = World(n_meetings, opts.seed)
+    backend = Backend(opts.latencies, opts.latency_scale, opts.throttle_rate, opts.error_rate, opts.seed)
+    main_args = main._build_parser().parse_args(["--no-cache", *opts.main_args])
+
+    workdir = tempfile.mkdtemp(prefix="prep-bench-")
+    error = None
+    tracing.enable()
+    start = time.perf_counter()
+    try:
+        with _fakes(backend, world, workdir, quotas=opts.quotas), contextlib.redirect_stdout(io.StringIO()):
+            main._run(main_args)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - start
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    stages: dict[str, float] = {}
+    for span in tracing.spans():
+        if span.name in _STAGES:
+            stages[span.name] = stages.get(span.name, 0.0) + span.duration
+    return {
+        "meetings": n_meetings,
+        "wall_s": round(wall, 3),
+        "stages_s": {k: round(v, 3) for k, v in stages.items()},
+        "calls": dict(sorted(backend.calls.items())),
+        "error": error,
+    }
+
+
+def _scenario_key(n_meetings: int, opts: argparse.Namespace) -> str:
+    return (
+        f"meetings={n_meetings} scale={opts.latency_scale} throttle={opts.throttle_rate} "
+        f"error={opts.error_rate}{' quotas' if opts.quotas else ''} args={' '.join(opts.main_args) or '-'}"
+    )
+
+
+def _regressions(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    problems = []
+    if result["error"] and not baseline.get("error"):
+        problems.append(f"run failed: {result['error']}")
+    if result["wall_s"] > baseline["wall_s"] * (1 + tolerance):
+        problems.append(f"wall {baseline['wall_s']:.2f}s → {result['wall_s']:.2f}s")
+    for op, count in result["calls"].items():
+        before = baseline["calls"].get(op, 0)
+        if count > before:
+            problems.append(f"{op} calls {before} → {count}")
+    return problems
+
+
+def _load_baselines() -> dict:
+    try:
+        with open(BASELINES_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _parse_latency(value: str) -> tuple[str, tuple[float, float]]:
+    op, _, numbers = value.partition("=")
+    median, _, p95 = numbers.partition("/")
+    if op not in DEFAULT_LATENCIES or not median:
+        raise argparse.ArgumentTypeError(
+            f"expected OP=MEDIAN_MS[/P95_MS] with OP one of {', '.join(DEFAULT_LATENCIES)}"
+        )
+    return op, (float(median), float(p95 or median))
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Offline benchmark for the weekly prep pipeline")
+    parser.add_argument(
+        "--meetings",
+        default="10,50,200,500",
+        help="Comma-separated week sizes to run (default 10,50,200,500)",
+    )
+    parser.add_argument(
+        "--latency-scale",
+        type=float,
+        default=0.05,
+        help="Multiply every simulated latency by this factor (default 0.05; 1.0 = production-like)",
+    )
+    parser.add_argument(
+        "--latency",
+        type=_parse_latency,
+        action="append",
+        default=[],
+        metavar="OP=MEDIAN_MS[/P95_MS]",
+        help=f"Override one call type's latency; call types: {', '.join(DEFAULT_LATENCIES)}",
+    )
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of calls that are throttled")
+    parser.add_argument(
+        "--quotas",
+        action="store_true",
+        help="Enforce the configured Bedrock/Gmail/Docs quotas (scaled like the latencies)",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls that fail outright")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the synthetic week and latencies")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed wall-time growth vs baseline")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Store results in {BASELINES_PATH}")
+    parser.add_argument("main_args", nargs="*", help="Extra main.py flags (after --)")
+    opts = parser.parse_args()
+    opts.latencies = {**DEFAULT_LATENCIES, **dict(opts.latency)}
+
+    baselines = _load_baselines()
+    regressed = False
+    for n_meetings in [int(n) for n in opts.meetings.split(",")]:
+        result = run_scenario(n_meetings, opts)
+        key = _scenario_key(n_meetings, opts)
+        print(f"{n_meetings} meetings: {result['wall_s']:.2f}s wall")
+        print("  stages: " + ", ".join(f"{k}={v:.2f}s" for k, v in result["stages_s"].items()))
+        print("  calls:  " + ", ".join(f"{k}={v}" for k, v in result["calls"].items()))
+        if result["error"]:
+            print(f"  FAILED: {result['error']}")
+
+        if opts.save_baseline:
+            baselines[key] = result
+        elif key in baselines:
+            problems = _regressions(result, baselines[key], opts.tolerance)
+            for problem in problems:
+                print(f"  REGRESSION: {problem}")
+            regressed |= bool(problems)
+
+    if opts.save_baseline:
+        with open(BASELINES_PATH, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"\nBaselines saved to {BASELINES_PATH}.")
+    elif regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
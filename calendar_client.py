@@ -1,7 +1,20 @@
-from datetime import datetime, timedelta
+from __future__ import annotations
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 
 import config
-from google_auth import build_service
+import rate_limit
+import tracing
+from google_auth import active_token_path, build_service, is_rate_limited
+
+# Overlap incremental syncs slightly to absorb clock skew between us and Google.
+_SYNC_SKEW = timedelta(minutes=2)
+
+_store_lock = threading.Lock()
 
 
 def _next_week_bounds() -> tuple[str, str]:
@@ -16,54 +29,200 @@ def _next_week_bounds() -> tuple[str, str]:
     return monday.isoformat() + "Z", saturday.isoformat() + "Z"
 
 
-def get_client_meetings() -> list[dict]:
-    """Fetch next week's calendar events that include at least one external attendee.
+def _list_events(service, calendar_id: str, time_min: str, time_max: str, updated_min: str | None = None) -> list[dict]:
+    """List every event in the window, following ``nextPageToken``.
+
+    With *updated_min* every event changed since then is returned instead,
+    wherever it now falls (so moves out of the window show up), including
+    cancelled ones so deletions can be applied.
+    """
+    params = {
+        "calendarId": calendar_id,
+        "singleEvents": True,
+        "maxResults": 250,
+    }
+    if updated_min:
+        params.update(updatedMin=updated_min, showDeleted=True)
+    else:
+        params.update(timeMin=time_min, timeMax=time_max, orderBy="startTime")
+
+    events: list[dict] = []
+    page_token = None
+    with tracing.span("calendar.list", calendar_id=calendar_id, incremental=bool(updated_min)) as span:
+        while True:
+            request = service.events().list(**params, pageToken=page_token)
+            result = rate_limit.call("calendar", request.execute, is_rate_limited)
+            events.extend(result.get("items", []))
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                span.set(events=len(events))
+                return events
+
+
+def _load_sync_store() -> dict:
+    try:
+        with open(config.CALENDAR_SYNC_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_sync_store(store: dict) -> None:
+    tmp_path = f"{config.CALENDAR_SYNC_PATH}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(store, f)
+    os.replace(tmp_path, config.CALENDAR_SYNC_PATH)
 
-    Returns a list of dicts with keys:
-        title, start, end, attendees (list of {email, name, external: bool})
+
+def parse_time(value: str) -> datetime:
+    """Parse a Calendar date or date-time as an aware datetime (UTC if no
+    offset is given).  A trailing ``Z`` is rewritten first, since
+    ``fromisoformat`` only accepts it from Python 3.11."""
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _in_window(event: dict, time_min: str, time_max: str) -> bool:
+    """Whether *event* overlaps the window, as ``timeMin``/``timeMax`` filter."""
+    start = event["start"].get("dateTime", event["start"].get("date"))
+    end = event["end"].get("dateTime", event["end"].get("date"))
+    return parse_time(end) > parse_time(time_min) and parse_time(start) < parse_time(time_max)
+
+
+def _sync_calendar(calendar_id: str, time_min: str, time_max: str, store: dict, full_sync: bool) -> list[dict]:
+    """Return the calendar's current events in the window.
+
+    The Calendar API does not allow ``syncToken`` together with a
+    ``timeMin``/``timeMax`` window, so repeat runs for the same week instead
+    ask for every event updated since the last sync (``updatedMin``, with
+    no window) and merge them into the locally stored copy, dropping those
+    that were cancelled or moved out of the window.
     """
+    from googleapiclient.errors import HttpError
+
     service = build_service("calendar", "v3")
-    time_min, time_max = _next_week_bounds()
+    synced_at = (datetime.now(timezone.utc) - _SYNC_SKEW).isoformat().replace("+00:00", "Z")
+    window = [time_min, time_max]
+    store_key = f"{active_token_path()}|{calendar_id}"
+
+    with _store_lock:
+        state = store.get(store_key)
+    events: dict[str, dict] | None = None
+    if state and state["window"] == window and not full_sync:
+        try:
+            changed = _list_events(service, calendar_id, time_min, time_max, updated_min=state["synced_at"])
+            events = dict(state["events"])
+            for event in changed:
+                if event.get("status") == "cancelled" or not _in_window(event, time_min, time_max):
+                    events.pop(event["id"], None)
+                else:
+                    events[event["id"]] = event
+        except HttpError as e:
+            if e.resp.status != 410:  # 410 Gone: too old to sync incrementally
+                raise
+
+    if events is None:
+        events = {
+            e["id"]: e
+            for e in _list_events(service, calendar_id, time_min, time_max)
+            if e.get("status") != "cancelled"
+        }
+
+    with _store_lock:
+        store[store_key] = {"window": window, "synced_at": synced_at, "events": events}
+    return list(events.values())
 
-    events_result = service.events().list(
-        calendarId="primary",
-        timeMin=time_min,
-        timeMax=time_max,
-        singleEvents=True,
-        orderBy="startTime",
-        maxResults=250,
-    ).execute()
-
-    meetings = []
-    for event in events_result.get("items", []):
-        attendees_raw = event.get("attendees", [])
-        if not attendees_raw:
-            continue
-
-        attendees = []
-        has_external = False
-        for a in attendees_raw:
-            email = a.get("email", "")
-            external = not email.endswith(f"@{config.COMPANY_DOMAIN}")
-            if external:
-                has_external = True
-            attendees.append({
-                "email": email,
-                "name": a.get("displayName", email),
-                "external": external,
-            })
-
-        if not has_external:
-            continue
-
-        start = event["start"].get("dateTime", event["start"].get("date"))
-        end = event["end"].get("dateTime", event["end"].get("date"))
-
-        meetings.append({
-            "title": event.get("summary", "(no title)"),
-            "start": start,
-            "end": end,
-            "attendees": attendees,
+
+def _start_key(meeting: dict) -> float:
+    return parse_time(meeting["start"]).timestamp()
+
+
+def _to_meeting(event: dict) -> dict | None:
+    """Reduce a Calendar event to a meeting dict, or None if it has no
+    external attendees."""
+    attendees_raw = event.get("attendees", [])
+    if not attendees_raw:
+        return None
+
+    attendees = []
+    has_external = False
+    for a in attendees_raw:
+        email = a.get("email", "")
+        external = not email.endswith(f"@{config.COMPANY_DOMAIN}")
+        if external:
+            has_external = True
+        attendees.append({
+            "email": email,
+            "name": a.get("displayName", email),
+            "external": external,
         })
 
-    return meetings
+    if not has_external:
+        return None
+
+    start = event["start"].get("dateTime", event["start"].get("date"))
+    end = event["end"].get("dateTime", event["end"].get("date"))
+
+    return {
+        "id": event.get("id"),
+        "title": event.get("summary", "(no title)"),
+        "start": start,
+        "end": end,
+        "attendees": attendees,
+    }
+
+
+def get_client_meetings(calendar_ids: list[str] | None = None, full_sync: bool = False) -> list[dict]:
+    """Fetch next week's calendar events that include at least one external attendee.
+
+    Events are read concurrently from every calendar in *calendar_ids*
+    (default ``config.CALENDAR_IDS``), merged and deduplicated by event id.
+    Repeat runs in the same week only pull changed events unless *full_sync*.
+
+    Returns a list of dicts sorted by start time, with keys:
+        id, title, start, end, attendees (list of {email, name, external: bool})
+    """
+    calendar_ids = calendar_ids or config.CALENDAR_IDS
+    time_min, time_max = _next_week_bounds()
+
+    store = _load_sync_store()
+    with ThreadPoolExecutor(max_workers=min(8, len(calendar_ids))) as pool:
+        per_calendar = list(pool.map(
+            lambda cid: _sync_calendar(cid, time_min, time_max, store, full_sync),
+            calendar_ids,
+        ))
+    _save_sync_store(store)
+
+    unique_events: dict[str, dict] = {}
+    for events in per_calendar:
+        for event in events:
+            unique_events.setdefault(event["id"], event)
+
+    meetings = [m for m in map(_to_meeting, unique_events.values()) if m is not None]
+    return sorted(meetings, key=_start_key)
+
+
+def get_meeting(event_id: str, calendar_ids: list[str] | None = None) -> dict | None:
+    """Fetch one event by id from the first of *calendar_ids* that has it.
+
+    Returns a meeting dict like :func:`get_client_meetings` (at any date),
+    or None if no calendar has the event or it has no external attendees.
+    """
+    from googleapiclient.errors import HttpError
+
+    service = build_service("calendar", "v3")
+    for calendar_id in calendar_ids or config.CALENDAR_IDS:
+        request = service.events().get(calendarId=calendar_id, eventId=event_id)
+        with tracing.span("calendar.get", calendar_id=calendar_id):
+            try:
+                event = rate_limit.call("calendar", request.execute, is_rate_limited)
+            except HttpError as e:
+                if e.resp.status in (404, 410):
+                    continue
+                raise
+        if event.get("status") == "cancelled":
+            return None
+        return _to_meeting(event)
+    return None
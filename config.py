@@ -3,18 +3,53 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Settings a subsystem cannot work without are checked on its first use
+# (see require()), so modes that never touch it don't need them set.
+
 # Snowflake
-SNOWFLAKE_ACCOUNT = os.environ["SNOWFLAKE_ACCOUNT"]
-SNOWFLAKE_USER = os.environ["SNOWFLAKE_USER"]
+SNOWFLAKE_ACCOUNT = os.environ.get("SNOWFLAKE_ACCOUNT", "")
+SNOWFLAKE_USER = os.environ.get("SNOWFLAKE_USER", "")
 SNOWFLAKE_PASSWORD = os.environ.get("SNOWFLAKE_PASSWORD", "")
-SNOWFLAKE_WAREHOUSE = os.environ["SNOWFLAKE_WAREHOUSE"]
+SNOWFLAKE_WAREHOUSE = os.environ.get("SNOWFLAKE_WAREHOUSE", "")
 SNOWFLAKE_DATABASE = os.environ.get("SNOWFLAKE_DATABASE", "PROD_DB")
+# "async" submits independent queries together via execute_async; "serial" runs them one by one
+SNOWFLAKE_QUERY_MODE = os.environ.get("SNOWFLAKE_QUERY_MODE", "async")
+# Max Snowflake statements (or async batches) in flight at once
+SNOWFLAKE_MAX_CONCURRENCY = int(os.environ.get("SNOWFLAKE_MAX_CONCURRENCY", "4"))
+
+# Where account data comes from: "snowflake" (live) or "mirror" (the local
+# snapshot written by `python main.py sync`; overridable with --data-backend)
+DATA_BACKEND = os.environ.get("DATA_BACKEND", "snowflake")
+# Accounts in the mirror older than this are re-fetched by the next sync
+MIRROR_MAX_AGE_HOURS = float(os.environ.get("MIRROR_MAX_AGE_HOURS", "24"))
 
 # AWS / Bedrock
 AWS_REGION = os.environ.get("AWS_REGION", "us-west-2")
+# Max concurrent Claude calls (overridable with --llm-concurrency)
+LLM_CONCURRENCY = int(os.environ.get("LLM_CONCURRENCY", "4"))
+# Bedrock quotas for the model; throttling also lowers concurrency adaptively (see rate_limit.py)
+BEDROCK_REQUESTS_PER_MINUTE = float(os.environ.get("BEDROCK_REQUESTS_PER_MINUTE", "50"))
+BEDROCK_TOKENS_PER_MINUTE = float(os.environ.get("BEDROCK_TOKENS_PER_MINUTE", "200000"))
+# Estimated input tokens allowed per meeting's prompt; 0 = no budget and no per-section row caps (overridable with --context-budget)
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "6000"))
 
 # Google
-GOOGLE_DOC_ID = os.environ["GOOGLE_DOC_ID"]
+GOOGLE_DOC_ID = os.environ.get("GOOGLE_DOC_ID", "")
+# Gmail per-user quota (threads.list and threads.get cost 10 units each) and max concurrent searches
+GMAIL_QUOTA_UNITS_PER_SECOND = float(os.environ.get("GMAIL_QUOTA_UNITS_PER_SECOND", "250"))
+GMAIL_MAX_CONCURRENCY = int(os.environ.get("GMAIL_MAX_CONCURRENCY", "4"))
+# Docs per-user write quota
+DOCS_WRITES_PER_MINUTE = float(os.environ.get("DOCS_WRITES_PER_MINUTE", "60"))
+# Prep-doc rotation: keep this many weeks live, archive older ones per quarter
+DOC_KEEP_WEEKS = int(os.environ.get("DOC_KEEP_WEEKS", "12"))
+# …and keep archiving the oldest weeks while the live doc exceeds this size
+DOC_MAX_CHARS = int(os.environ.get("DOC_MAX_CHARS", "1000000"))
+# Rotate automatically after each run that writes to the doc (opt-in: a
+# rotation reads the whole doc)
+DOC_AUTO_ROTATE = os.environ.get("DOC_AUTO_ROTATE", "false").lower() in ("1", "true", "yes")
+
+# Calendars to read meetings from (comma-separated ids: your own, teammates', shared team calendars)
+CALENDAR_IDS = [c.strip() for c in os.environ.get("CALENDAR_IDS", "primary").split(",") if c.strip()]
 
 # Company domain — emails matching this are internal, everything else is external
 COMPANY_DOMAIN = os.environ.get("COMPANY_DOMAIN", "carta.com")
@@ -30,3 +65,30 @@ GOOGLE_SCOPES = [
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CREDENTIALS_PATH = os.path.join(BASE_DIR, "credentials.json")
 TOKEN_PATH = os.path.join(BASE_DIR, "token.json")
+DISCOVERY_CACHE_DIR = os.path.join(BASE_DIR, ".discovery_cache")
+SUMMARY_CACHE_DIR = os.path.join(BASE_DIR, ".summary_cache")
+RUN_JOURNAL_DIR = os.path.join(BASE_DIR, "runs")
+DOC_ARCHIVE_REGISTRY_PATH = os.path.join(BASE_DIR, "doc_archives.json")
+CALENDAR_SYNC_PATH = os.path.join(BASE_DIR, "calendar_sync.json")
+ACCOUNT_INDEX_PATH = os.path.join(BASE_DIR, "account_index.sqlite")
+MIRROR_PATH = os.path.join(BASE_DIR, "mirror.sqlite")
+PREP_HISTORY_DIR = os.path.join(BASE_DIR, ".prep_history")
+
+# How long a cached domain → account resolution (hit or miss) stays valid
+ACCOUNT_INDEX_TTL_DAYS = float(os.environ.get("ACCOUNT_INDEX_TTL_DAYS", "7"))
+
+# `python main.py serve`: local port, worker threads, and how long fetched account data is reused between requests
+SERVE_PORT = int(os.environ.get("SERVE_PORT", "8765"))
+SERVE_WORKERS = int(os.environ.get("SERVE_WORKERS", "4"))
+SERVE_ACCOUNT_MAX_AGE_MINUTES = float(os.environ.get("SERVE_ACCOUNT_MAX_AGE_MINUTES", "15"))
+
+# Generated-summary cache eviction limits
+SUMMARY_CACHE_MAX_AGE_DAYS = float(os.environ.get("SUMMARY_CACHE_MAX_AGE_DAYS", "30"))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.environ.get("SUMMARY_CACHE_MAX_ENTRIES", "2000"))
+
+
+def require(subsystem: str, *names: str) -> None:
+    """Exit with a clear message if any setting in *names* is empty."""
+    missing = [name for name in names if not globals()[name]]
+    if missing:
+        raise SystemExit(f"{subsystem} needs {', '.join(missing)} set (see .env.example).")
@@ -0,0 +1,165 @@
+"""Fit one meeting's gathered data into a bounded prompt.
+
+Big accounts can bring hundreds of greenspace products, many near-identical
+email threads and long upsell/usage lists.  Before summarizing, every
+section is ranked by relevance, near-duplicate threads are collapsed, long
+sections are capped, and — if the estimated prompt is still over the
+per-meeting token budget — the lowest-ranked rows are dropped, least
+important section first.  Whatever is left out is reported as counts, both
+to the caller and to the model (the payload's ``omitted`` object).
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import config
+from summarizer import build_payload, encode_payload
+
+# Rough size of a token in compact JSON; good enough for budgeting.
+_CHARS_PER_TOKEN = 4
+
+# Rows kept per section before any budget is applied (unless the budget is 0).
+_SECTION_CAPS = {
+    "recent_emails": 15,
+    "greenspace": 40,
+    "upsell_signals": 10,
+    "product_usage": 10,
+}
+
+# Sections in the order they give way when over budget, with the number of
+# top-ranked rows always kept.
+_TRIM_ORDER = [
+    ("greenspace", 5),
+    ("product_usage", 5),
+    ("upsell_signals", 3),
+    ("recent_emails", 3),
+    ("opportunities", 3),
+    ("subscriptions", 5),
+]
+
+# Threads fold together when their snippets agree on this many characters.
+_SNIPPET_MATCH_CHARS = 60
+# Subjects that say nothing about the conversation (gmail_client's fallback)
+_PLACEHOLDER_SUBJECTS = {"", "(no subject)"}
+
+_REPLY_PREFIX_RE = re.compile(r"^\s*((re|fwd?|aw)\s*:\s*)+", re.I)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _estimate_tokens(value) -> int:
+    return len(encode_payload(value)) // _CHARS_PER_TOKEN + 1
+
+
+def _thread_date(thread: dict) -> datetime:
+    try:
+        date = parsedate_to_datetime(thread.get("date", ""))
+    except (TypeError, ValueError):
+        return datetime.min.replace(tzinfo=timezone.utc)
+    return date if date.tzinfo else date.replace(tzinfo=timezone.utc)
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def _collapse_threads(threads: list[dict]) -> tuple[list[dict], int]:
+    """Newest first, folding threads whose snippets match into the newest one.
+
+    Threads with a real subject only fold into ones with the same normalized
+    subject too; subject-less threads (gmail_client's "(no subject)") and
+    threads without a snippet are never folded.  Kept threads note how many
+    similar ones were folded into them (``similar_threads``).  Returns the
+    threads and the number collapsed.
+    """
+    kept: list[dict] = []
+    seen: dict[tuple[str, str], dict] = {}
+    for thread in sorted(threads, key=_thread_date, reverse=True):
+        subject = _normalize(_REPLY_PREFIX_RE.sub("", thread.get("subject", "")))
+        if subject in _PLACEHOLDER_SUBJECTS:
+            subject = ""
+        snippet = _normalize(thread.get("snippet", ""))[:_SNIPPET_MATCH_CHARS]
+        match = seen.get((subject, snippet)) if snippet else None
+        if match is not None:
+            match["similar_threads"] = match.get("similar_threads", 0) + 1
+            continue
+        thread = dict(thread)
+        kept.append(thread)
+        if snippet:
+            seen[(subject, snippet)] = thread
+    return kept, len(threads) - len(kept)
+
+
+def _rank_greenspace(greenspace: list[dict], upsell_signals: list[dict]) -> list[dict]:
+    """Products the account has shown upsell interest in first, then catalog order."""
+    interested = {s.get("PRODUCT_NAME") for s in upsell_signals}
+    return sorted(greenspace, key=lambda p: p.get("PRODUCT_NAME") not in interested)
+
+
+def build_context(
+    meeting: dict,
+    email_threads: list[dict],
+    snowflake_data: dict,
+    token_budget: int | None = None,
+) -> dict:
+    """Rank, dedupe and trim one meeting's inputs to fit *token_budget*.
+
+    *token_budget* defaults to ``config.CONTEXT_TOKEN_BUDGET``; 0 disables
+    trimming altogether, section caps included (ranking and thread
+    collapsing still apply).
+
+    Returns a dict with keys: email_threads, snowflake_data (trimmed
+    copies), omitted ({section: rows left out}), collapsed_threads and
+    estimated_tokens.
+    """
+    if token_budget is None:
+        token_budget = config.CONTEXT_TOKEN_BUDGET
+
+    threads, collapsed = _collapse_threads(email_threads)
+    sections: dict[str, list] = {
+        # Subscriptions arrive by ARR, opportunities by close date and upsell
+        # / usage signals by recency / volume — already in relevance order.
+        "recent_emails": threads,
+        "subscriptions": list(snowflake_data.get("subscriptions") or []),
+        "opportunities": list(snowflake_data.get("opportunities") or []),
+        "upsell_signals": list(snowflake_data.get("upsell_signals") or []),
+        "greenspace": _rank_greenspace(
+            snowflake_data.get("greenspace") or [], snowflake_data.get("upsell_signals") or []
+        ),
+        "product_usage": list(snowflake_data.get("product_usage") or []),
+    }
+
+    omitted: dict[str, int] = {}
+    if token_budget:
+        for name, cap in _SECTION_CAPS.items():
+            if len(sections[name]) > cap:
+                omitted[name] = len(sections[name]) - cap
+                del sections[name][cap:]
+
+    def _assemble() -> tuple[list[dict], dict]:
+        data = dict(snowflake_data)
+        data.update({k: v for k, v in sections.items() if k != "recent_emails"})
+        return sections["recent_emails"], data
+
+    estimated = _estimate_tokens(build_payload(meeting, *_assemble(), omitted=omitted or None))
+    if token_budget and estimated > token_budget:
+        over = estimated - token_budget
+        for name, keep in _TRIM_ORDER:
+            rows = sections[name]
+            while over > 0 and len(rows) > keep:
+                over -= _estimate_tokens(list(rows.pop().values()))
+                omitted[name] = omitted.get(name, 0) + 1
+            if over <= 0:
+                break
+        estimated = _estimate_tokens(build_payload(meeting, *_assemble(), omitted=omitted or None))
+
+    threads, data = _assemble()
+    return {
+        "email_threads": threads,
+        "snowflake_data": data,
+        "omitted": omitted,
+        "collapsed_threads": collapsed,
+        "estimated_tokens": estimated,
+    }
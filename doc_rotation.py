@@ -0,0 +1,230 @@
+"""Rotate old weeks out of the running prep doc into per-quarter archives.
+
+Week blocks are found by the ``HEADING_1`` "Week of …" label that
+``docs_client`` writes at the top of every run.  Blocks beyond the newest
+``DOC_KEEP_WEEKS`` (and, if the doc is still larger than ``DOC_MAX_CHARS``,
+the oldest remaining ones) are copied into a "<doc title> — Archive <year>
+Q<n>" document, deleted from the live doc, and a link to each archive is
+left at the top of the live doc.
+
+Every step is idempotent: a week already present in full in its archive is
+not copied again (a partial copy left by an interrupted run is replaced),
+a block is deleted from the live doc only once its archive copy is verified
+complete, and missing archive links are added on every run — so a rotation
+interrupted at any point can simply be re-run.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from datetime import datetime
+
+import config
+from docs_client import DocWriter, execute_read, execute_write
+from google_auth import build_service
+
+_WEEK_LABEL_RE = re.compile(r"^Week of (\w{3} \d{1,2}, \d{4})$")
+_SEPARATOR = "=" * 60
+
+
+def _paragraphs(doc: dict) -> list[dict]:
+    """Flatten the body into paragraphs with their text, style and runs."""
+    paragraphs = []
+    for element in doc["body"]["content"]:
+        paragraph = element.get("paragraph")
+        if paragraph is None:
+            continue
+        runs = [e["textRun"] for e in paragraph.get("elements", []) if "textRun" in e]
+        paragraphs.append({
+            "start": element["startIndex"],
+            "end": element["endIndex"],
+            "text": "".join(r["content"] for r in runs),
+            "style": paragraph.get("paragraphStyle", {}).get("namedStyleType", "NORMAL_TEXT"),
+            "runs": runs,
+        })
+    return paragraphs
+
+
+def _week_blocks(doc: dict) -> list[dict]:
+    """Return the doc's week blocks, oldest first.
+
+    Each block has: label, date, start, end (exclusive) and its paragraphs.
+    A block starts at the separator line (and blank line) written before its
+    heading and runs until the next block or the end of the body.
+    """
+    paragraphs = _paragraphs(doc)
+    body_end = doc["body"]["content"][-1]["endIndex"] - 1  # keep the final newline
+
+    heads = []
+    for i, p in enumerate(paragraphs):
+        match = _WEEK_LABEL_RE.match(p["text"].strip())
+        if p["style"] == "HEADING_1" and match:
+            first = i
+            if first > 0 and paragraphs[first - 1]["text"].strip() == _SEPARATOR:
+                first -= 1
+                if first > 0 and not paragraphs[first - 1]["text"].strip():
+                    first -= 1
+            heads.append((first, p["text"].strip(), datetime.strptime(match.group(1), "%b %d, %Y")))
+
+    blocks = []
+    for n, (first, label, date) in enumerate(heads):
+        last = heads[n + 1][0] if n + 1 < len(heads) else len(paragraphs)
+        block_paragraphs = paragraphs[first:last]
+        blocks.append({
+            "label": label,
+            "date": date,
+            "start": block_paragraphs[0]["start"],
+            "end": min(block_paragraphs[-1]["end"], body_end),
+            "paragraphs": block_paragraphs,
+        })
+    return sorted(blocks, key=lambda b: b["date"])
+
+
+def _quarter(date: datetime) -> str:
+    return f"{date.year} Q{(date.month - 1) // 3 + 1}"
+
+
+def _doc_url(document_id: str) -> str:
+    return f"https://docs.google.com/document/d/{document_id}/edit"
+
+
+def _load_registry() -> dict:
+    try:
+        with open(config.DOC_ARCHIVE_REGISTRY_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_registry(registry: dict) -> None:
+    tmp_path = f"{config.DOC_ARCHIVE_REGISTRY_PATH}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(registry, f, indent=2)
+    os.replace(tmp_path, config.DOC_ARCHIVE_REGISTRY_PATH)
+
+
+def _select_for_archive(blocks: list[dict], total_chars: int) -> list[dict]:
+    """Blocks to move: everything older than the newest DOC_KEEP_WEEKS, then
+    the oldest remaining ones while the doc exceeds DOC_MAX_CHARS."""
+    keep = max(1, config.DOC_KEEP_WEEKS)
+    selected = blocks[:-keep] if len(blocks) > keep else []
+    remaining_chars = total_chars - sum(b["end"] - b["start"] for b in selected)
+    for block in blocks[len(selected):-1]:
+        if remaining_chars <= config.DOC_MAX_CHARS:
+            break
+        selected.append(block)
+        remaining_chars -= block["end"] - block["start"]
+    return selected
+
+
+def _block_text(block: dict) -> str:
+    # The last block of a doc also owns its final empty paragraph
+    return "".join(p["text"] for p in block["paragraphs"]).rstrip("\n")
+
+
+def _copy_block(writer: DocWriter, block: dict) -> None:
+    for p in block["paragraphs"]:
+        heading = p["style"] if p["style"] != "NORMAL_TEXT" else None
+        for n, run in enumerate(p["runs"]):
+            style = run.get("textStyle", {})
+            size = style.get("fontSize", {}).get("magnitude")
+            writer.add(
+                run["content"],
+                bold=bool(style.get("bold")),
+                font_size=int(size) if size else None,
+                heading=heading if n == 0 else None,
+            )
+
+
+def rotate_doc(document_id: str | None = None, dry_run: bool = False) -> list[str]:
+    """Move old week blocks of *document_id* into per-quarter archive docs.
+
+    Returns the labels of the weeks that were (or, with *dry_run*, would be)
+    archived.
+    """
+    if not document_id:
+        config.require("Google Docs", "GOOGLE_DOC_ID")
+    document_id = document_id or config.GOOGLE_DOC_ID
+    service = build_service("docs", "v1")
+    doc = execute_read(service.documents().get(documentId=document_id))
+    blocks = _week_blocks(doc)
+    to_archive = _select_for_archive(blocks, doc["body"]["content"][-1]["endIndex"])
+    if dry_run:
+        return [b["label"] for b in to_archive]
+
+    registry = _load_registry()
+    archives = registry.setdefault(document_id, {})
+
+    # 1. Copy each block into its quarter's archive (skipping ones already
+    #    there in full), then keep only the blocks the archive now holds
+    by_quarter: dict[str, list[dict]] = {}
+    for block in to_archive:
+        by_quarter.setdefault(_quarter(block["date"]), []).append(block)
+
+    archived: list[dict] = []
+    for quarter, quarter_blocks in by_quarter.items():
+        archive_id = archives.get(quarter)
+        if archive_id is None:
+            title = f"{doc.get('title', 'Meeting Prep')} — Archive {quarter}"
+            archive_id = execute_write(service.documents().create(body={"title": title}))["documentId"]
+            archives[quarter] = archive_id
+            _save_registry(registry)
+
+        archive_blocks = _week_blocks(execute_read(service.documents().get(documentId=archive_id)))
+        complete = {_block_text(b) for b in archive_blocks}
+        missing = [b for b in quarter_blocks if _block_text(b) not in complete]
+        if missing:
+            # Drop partial copies an interrupted run left behind before re-copying
+            missing_labels = {b["label"] for b in missing}
+            partial = [b for b in archive_blocks if b["label"] in missing_labels]
+            if partial:
+                execute_write(service.documents().batchUpdate(
+                    documentId=archive_id,
+                    body={"requests": [
+                        {"deleteContentRange": {"range": {"startIndex": b["start"], "endIndex": b["end"]}}}
+                        for b in sorted(partial, key=lambda b: b["start"], reverse=True)
+                    ]},
+                ))
+            writer = DocWriter(archive_id)
+            for block in missing:
+                _copy_block(writer, block)
+            writer.flush()
+            complete = {_block_text(b) for b in _week_blocks(
+                execute_read(service.documents().get(documentId=archive_id))
+            )}
+        archived.extend(b for b in quarter_blocks if _block_text(b) in complete)
+
+    # 2. Delete the archived blocks from the live doc, last block first so
+    #    earlier indexes stay valid
+    if archived:
+        execute_write(service.documents().batchUpdate(
+            documentId=document_id,
+            body={"requests": [
+                {"deleteContentRange": {"range": {"startIndex": b["start"], "endIndex": b["end"]}}}
+                for b in sorted(archived, key=lambda b: b["start"], reverse=True)
+            ]},
+        ))
+
+    # 3. Leave a link to every archive at the top of the live doc (newest
+    #    first) — also when there is nothing left to move, so links missed by
+    #    an interrupted run are still added
+    live_text = "".join(p["text"] for p in _paragraphs(doc))
+    requests: list[dict] = []
+    for quarter, archive_id in sorted(archives.items()):
+        label = f"Archived prep notes — {quarter}"
+        if label in live_text:
+            continue
+        requests.append({"insertText": {"location": {"index": 1}, "text": f"{label}\n"}})
+        requests.append({
+            "updateTextStyle": {
+                "range": {"startIndex": 1, "endIndex": 1 + len(label)},
+                "textStyle": {"link": {"url": _doc_url(archive_id)}},
+                "fields": "link",
+            }
+        })
+    if requests:
+        execute_write(service.documents().batchUpdate(documentId=document_id, body={"requests": requests}))
+
+    return [b["label"] for b in archived]
@@ -3,7 +3,9 @@ from __future__ import annotations
 from datetime import datetime, timedelta
 
 import config
-from google_auth import build_service
+import rate_limit
+import tracing
+from google_auth import build_service, is_rate_limited
 
 
 def _next_monday_label() -> str:
@@ -16,76 +18,152 @@ def _next_monday_label() -> str:
     return monday.strftime("Week of %b %-d, %Y")
 
 
-def append_to_doc(sections: list[dict]) -> None:
-    """Append meeting-prep sections to the running Google Doc.
+# Keep each batchUpdate well below the Docs API request size limits.
+_MAX_REQUESTS_PER_BATCH = 400
+_MAX_TEXT_CHARS_PER_BATCH = 100_000
+
+
+def execute_write(request):
+    """Execute a Docs write *request* within the per-user write quota,
+    retrying it if Google rejects it for rate limits (nothing was applied)."""
+    return rate_limit.call("docs", request.execute, is_rate_limited, writes=1)
+
+
+def execute_read(request):
+    """Execute a Docs read *request*, retrying it if Google rejects it for
+    rate limits."""
+    return rate_limit.call("docs", request.execute, is_rate_limited)
 
-    Each item in *sections* should have keys: title (meeting title) and body
-    (the Claude-generated summary text).
-    """
-    service = build_service("docs", "v1")
-
-    # Build the list of insertText requests (inserted at the end of the doc).
-    # Google Docs insertText index 1 = start of document, but we want the end,
-    # so we first fetch the doc to get the endIndex.
-    doc = service.documents().get(documentId=config.GOOGLE_DOC_ID).execute()
-    end_index = doc["body"]["content"][-1]["endIndex"] - 1  # before trailing newline
-
-    week_label = _next_monday_label()
-
-    # We build text blocks and batch-insert them.  All inserts are at *end_index*
-    # and we track the running offset.
-    requests: list[dict] = []
-    offset = end_index
-
-    def _insert(text: str, bold: bool = False, font_size: int | None = None, heading: str | None = None):
-        nonlocal offset
-        requests.append({
-            "insertText": {
-                "location": {"index": offset},
-                "text": text,
-            }
-        })
-        start = offset
-        end = offset + len(text)
-
-        if bold or font_size:
-            style: dict = {}
-            fields = []
-            if bold:
-                style["bold"] = True
-                fields.append("bold")
-            if font_size:
-                style["fontSize"] = {"magnitude": font_size, "unit": "PT"}
-                fields.append("fontSize")
-            requests.append({
-                "updateTextStyle": {
-                    "range": {"startIndex": start, "endIndex": end},
-                    "textStyle": style,
-                    "fields": ",".join(fields),
-                }
-            })
-
-        if heading:
-            requests.append({
-                "updateParagraphStyle": {
-                    "range": {"startIndex": start, "endIndex": end},
-                    "paragraphStyle": {"namedStyleType": heading},
-                    "fields": "namedStyleType",
-                }
-            })
 
-        offset = end
+def _utf16_len(text: str) -> int:
+    """Length of *text* in Docs indexes, which count UTF-16 code units
+    (an emoji or other non-BMP character takes two)."""
+    return len(text.encode("utf-16-le")) // 2
 
-    # --- Week header ---
-    _insert(f"\n{'=' * 60}\n")
-    _insert(f"{week_label}\n", heading="HEADING_1")
 
-    for section in sections:
-        _insert(f"\n--- {section['title']} ---\n", bold=True, font_size=12)
-        _insert(section["body"] + "\n")
+def _end_index(service, document_id: str) -> int:
+    """Index just before the document's trailing newline.
 
-    # Execute batch update
-    service.documents().batchUpdate(
-        documentId=config.GOOGLE_DOC_ID,
-        body={"requests": requests},
-    ).execute()
+    Uses a field mask so only the body's structural end indexes come back
+    rather than the whole (ever-growing) document.
+    """
+    with tracing.span("docs.end_index"):
+        doc = execute_read(service.documents().get(
+            documentId=document_id,
+            fields="body.content(endIndex)",
+        ))
+    return doc["body"]["content"][-1]["endIndex"] - 1
+
+
+class DocWriter:
+    """Buffers styled text blocks and appends them to the end of a Doc.
+
+    Blocks are rendered into insert/style requests only at :meth:`flush`,
+    against the document's current end index, and sent as one or more
+    size-bounded batchUpdates.  Because the requests are applied in order
+    and every insert advances the running offset, splitting them across
+    batches keeps the indexes correct.
+    """
+
+    def __init__(self, document_id: str | None = None):
+        if not document_id:
+            config.require("Google Docs", "GOOGLE_DOC_ID")
+        self.document_id = document_id or config.GOOGLE_DOC_ID
+        self.service = build_service("docs", "v1")
+        self._blocks: list[tuple[str, bool, int | None, str | None]] = []
+
+    def add(self, text: str, bold: bool = False, font_size: int | None = None, heading: str | None = None) -> None:
+        self._blocks.append((text, bold, font_size, heading))
+
+    def add_week_header(self, week_label: str) -> None:
+        self.add(f"\n{'=' * 60}\n")
+        self.add(f"{week_label}\n", heading="HEADING_1")
+
+    def add_section(self, section: dict) -> None:
+        self.add(f"\n--- {section['title']} ---\n", bold=True, font_size=12)
+        self.add(section["body"] + "\n")
+
+    def _render(self, offset: int) -> list[list[dict]]:
+        """Turn buffered blocks into request groups (one insert + its styles)."""
+        groups: list[list[dict]] = []
+        for text, bold, font_size, heading in self._blocks:
+            group: list[dict] = [{
+                "insertText": {
+                    "location": {"index": offset},
+                    "text": text,
+                }
+            }]
+            start = offset
+            end = offset + _utf16_len(text)
+
+            if bold or font_size:
+                style: dict = {}
+                fields = []
+                if bold:
+                    style["bold"] = True
+                    fields.append("bold")
+                if font_size:
+                    style["fontSize"] = {"magnitude": font_size, "unit": "PT"}
+                    fields.append("fontSize")
+                group.append({
+                    "updateTextStyle": {
+                        "range": {"startIndex": start, "endIndex": end},
+                        "textStyle": style,
+                        "fields": ",".join(fields),
+                    }
+                })
+
+            if heading:
+                group.append({
+                    "updateParagraphStyle": {
+                        "range": {"startIndex": start, "endIndex": end},
+                        "paragraphStyle": {"namedStyleType": heading},
+                        "fields": "namedStyleType",
+                    }
+                })
+
+            groups.append(group)
+            offset = end
+        return groups
+
+    def flush(self) -> None:
+        """Append everything buffered so far to the end of the document."""
+        if not self._blocks:
+            return
+
+        batch: list[dict] = []
+        batch_chars = 0
+        for group in self._render(_end_index(self.service, self.document_id)):
+            group_chars = len(group[0]["insertText"]["text"])
+            if batch and (
+                len(batch) + len(group) > _MAX_REQUESTS_PER_BATCH
+                or batch_chars + group_chars > _MAX_TEXT_CHARS_PER_BATCH
+            ):
+                self._execute(batch)
+                batch, batch_chars = [], 0
+            batch.extend(group)
+            batch_chars += group_chars
+        self._execute(batch)
+        self._blocks.clear()
+
+    def _execute(self, requests: list[dict]) -> None:
+        size = sum(len(r["insertText"]["text"].encode("utf-8")) for r in requests if "insertText" in r)
+        with tracing.span("docs.batch_update", requests=len(requests), bytes=size):
+            execute_write(self.service.documents().batchUpdate(
+                documentId=self.document_id,
+                body={"requests": requests},
+            ))
+
+
+def append_to_doc(sections: list[dict], document_id: str | None = None) -> None:
+    """Append meeting-prep sections to the running Google Doc.
+
+    Each item in *sections* should have keys: title (meeting title) and body
+    (the Claude-generated summary text).
+    """
+    with tracing.span("docs.append", sections=len(sections)):
+        writer = DocWriter(document_id)
+        writer.add_week_header(_next_monday_label())
+        for section in sections:
+            writer.add_section(section)
+        writer.flush()
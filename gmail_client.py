@@ -1,45 +1,168 @@
 import base64
+import threading
 from datetime import datetime, timedelta
 
-from google_auth import build_service
+import rate_limit
+import tracing
+from google_auth import active_token_path, build_service, is_rate_limited
 
+# Gmail accepts up to 100 calls per batch HTTP request.
+_BATCH_SIZE = 100
 
-def get_recent_threads(email: str, days: int = 14, max_threads: int = 10) -> list[dict]:
-    """Search Gmail for recent threads involving *email* within the last *days* days.
+# Quota units charged per call (threads.list and threads.get both cost 10).
+_LIST_UNITS = 10
+_GET_UNITS = 10
+
+# Rounds of re-batching for thread fetches rejected inside a batch.
+_MAX_BATCH_ROUNDS = 5
+
+# Keep combined searches well under Gmail's query-length limit.
+_MAX_QUERY_CHARS = 1500
+
+# Run-scoped (mailbox, thread id) → metadata cache, shared by every meeting
+# and worker.  The mailbox is the active Google token file.
+_thread_cache: dict[tuple[str, str], dict] = {}
+_cache_lock = threading.Lock()
+
+
+def _thread_summary(thread: dict) -> dict | None:
+    """Reduce a ``format="metadata"`` thread to subject/snippet/date."""
+    messages = thread.get("messages", [])
+    if not messages:
+        return None
+
+    # Pull headers from the first message in the thread
+    headers = {h["name"]: h["value"] for h in messages[0].get("payload", {}).get("headers", [])}
+
+    return {
+        "subject": headers.get("Subject", "(no subject)"),
+        "snippet": messages[0].get("snippet", ""),
+        "date": headers.get("Date", ""),
+    }
 
-    Returns a list of dicts with keys: subject, snippet, date.
+
+def _get_thread_metadata(service, thread_ids: list[str]) -> dict[str, dict]:
+    """Fetch metadata for *thread_ids* using batched HTTP requests.
+
+    Returns a dict keyed by thread id.  Sub-requests Gmail rejects for rate
+    limits are re-batched after a backoff; threads whose sub-request fails
+    otherwise (or that have no messages) are left out.
     """
-    service = build_service("gmail", "v1")
+    found: dict[str, dict] = {}
+    throttled: list[str] = []
+
+    def _on_response(request_id, response, exception):
+        if exception is not None:
+            if is_rate_limited(exception):
+                throttled.append(request_id)
+            else:
+                print(f"  WARNING: could not fetch Gmail thread {request_id}: {exception}")
+            return
+        summary = _thread_summary(response)
+        if summary is not None:
+            found[request_id] = summary
+
+    pending = list(thread_ids)
+    for round_ in range(1, _MAX_BATCH_ROUNDS + 1):
+        for start in range(0, len(pending), _BATCH_SIZE):
+            chunk = pending[start:start + _BATCH_SIZE]
+            batch = service.new_batch_http_request(callback=_on_response)
+            for thread_id in chunk:
+                batch.add(
+                    service.users().threads().get(
+                        userId="me",
+                        id=thread_id,
+                        format="metadata",
+                        metadataHeaders=["Subject", "Date"],
+                    ),
+                    request_id=thread_id,
+                )
+            with tracing.span("gmail.get_batch", threads=len(chunk)):
+                rate_limit.call("gmail", batch.execute, is_rate_limited, units=_GET_UNITS * len(chunk))
+
+        if not throttled:
+            break
+        pending, throttled[:] = list(throttled), []
+        if round_ == _MAX_BATCH_ROUNDS:
+            print(f"  WARNING: Gmail kept rate-limiting {len(pending)} thread fetches; skipping them")
+            break
+        delay = rate_limit.backoff(round_)
+        rate_limit.get("gmail").on_throttle(delay)
+        print(f"  gmail throttled {len(pending)} thread fetches; re-batching in {delay:.1f}s …")
+
+    return found
+
+
+def _build_queries(emails: list[str], after_date: str) -> list[tuple[str, int]]:
+    """OR-combine ``from:/to:`` terms for *emails* into as few searches as fit
+    within ``_MAX_QUERY_CHARS``.  Returns ``(query, n_emails)`` pairs."""
+    suffix = f" after:{after_date}"
+    queries: list[tuple[str, int]] = []
+    terms: list[str] = []
 
+    def _flush():
+        if terms:
+            queries.append((f"({' OR '.join(terms)}){suffix}", len(terms) // 2))
+            terms.clear()
+
+    for email in emails:
+        pair = [f"from:{email}", f"to:{email}"]
+        if terms and len(" OR ".join(terms + pair)) + len(suffix) + 2 > _MAX_QUERY_CHARS:
+            _flush()
+        terms.extend(pair)
+    _flush()
+    return queries
+
+
+def get_threads_for_emails(emails: list[str], days: int = 14, max_threads: int = 10) -> list[dict]:
+    """Search Gmail once for recent threads involving any of *emails*.
+
+    The addresses are OR-combined into as few searches as possible, results
+    are deduplicated by thread id, and thread metadata is served from a
+    run-wide cache so a thread shared by several attendees or meetings is
+    only fetched once.  *max_threads* is a per-address budget.
+
+    Returns a list of dicts with keys: id, subject, snippet, date.
+    """
+    unique_emails = list(dict.fromkeys(e.lower() for e in emails))
+    if not unique_emails:
+        return []
+
+    service = build_service("gmail", "v1")
     after_date = (datetime.now() - timedelta(days=days)).strftime("%Y/%m/%d")
-    query = f"from:{email} OR to:{email} after:{after_date}"
-
-    results = service.users().threads().list(
-        userId="me",
-        q=query,
-        maxResults=max_threads,
-    ).execute()
-
-    threads = []
-    for t in results.get("threads", []):
-        thread = service.users().threads().get(
-            userId="me",
-            id=t["id"],
-            format="metadata",
-            metadataHeaders=["Subject", "Date"],
-        ).execute()
-
-        messages = thread.get("messages", [])
-        if not messages:
-            continue
-
-        # Pull headers from the first message in the thread
-        headers = {h["name"]: h["value"] for h in messages[0].get("payload", {}).get("headers", [])}
-
-        threads.append({
-            "subject": headers.get("Subject", "(no subject)"),
-            "snippet": messages[0].get("snippet", ""),
-            "date": headers.get("Date", ""),
-        })
-
-    return threads
+
+    thread_ids: list[str] = []
+    for query, n_emails in _build_queries(unique_emails, after_date):
+        with tracing.span("gmail.list", emails=n_emails) as span:
+            request = service.users().threads().list(
+                userId="me",
+                q=query,
+                maxResults=min(500, max_threads * n_emails),
+            )
+            results = rate_limit.call("gmail", request.execute, is_rate_limited, units=_LIST_UNITS)
+            span.set(threads=len(results.get("threads", [])))
+        thread_ids.extend(t["id"] for t in results.get("threads", []))
+    thread_ids = list(dict.fromkeys(thread_ids))
+
+    mailbox = active_token_path()
+    with _cache_lock:
+        missing = [tid for tid in thread_ids if (mailbox, tid) not in _thread_cache]
+    if missing:
+        fetched = _get_thread_metadata(service, missing)
+        with _cache_lock:
+            _thread_cache.update({(mailbox, tid): meta for tid, meta in fetched.items()})
+
+    with _cache_lock:
+        return [
+            {"id": tid, **_thread_cache[(mailbox, tid)]}
+            for tid in thread_ids
+            if (mailbox, tid) in _thread_cache
+        ]
+
+
+def get_recent_threads(email: str, days: int = 14, max_threads: int = 10) -> list[dict]:
+    """Search Gmail for recent threads involving *email* within the last *days* days.
+
+    Returns a list of dicts with keys: id, subject, snippet, date.
+    """
+    return get_threads_for_emails([email], days=days, max_threads=max_threads)
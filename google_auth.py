@@ -1,36 +1,145 @@
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from __future__ import annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING
 
 import config
 
+# The Google client libraries are imported on first use: they are slow to
+# load and not every mode talks to Google.
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+
+# Credentials are loaded/refreshed once per process (per token file) and
+# shared by all threads.  Team mode switches the active token file per rep.
+_creds: dict[str, Credentials] = {}
+_creds_lock = threading.Lock()
+_active_token_path = config.TOKEN_PATH
+
+# Discovery documents (raw JSON) keyed by (api, version).
+_discovery_docs: dict[tuple[str, str], str] = {}
+_discovery_lock = threading.Lock()
+
+# httplib2 is not thread-safe, so every thread gets its own service objects.
+_local = threading.local()
+
+
+def use_token(token_path: str) -> None:
+    """Make *token_path* the Google account used by subsequent API calls."""
+    global _active_token_path
+    _active_token_path = token_path
 
-def get_credentials() -> Credentials:
-    """Return valid Google OAuth2 credentials, refreshing or running the
-    interactive flow as needed."""
-    creds = None
 
-    # Reuse saved token if available
+def active_token_path() -> str:
+    return _active_token_path
+
+
+def _save_token(creds: Credentials, token_path: str) -> None:
+    """Write *creds* to *token_path*, but only if the stored token changed."""
+    data = creds.to_json()
     try:
-        creds = Credentials.from_authorized_user_file(config.TOKEN_PATH, config.GOOGLE_SCOPES)
-    except Exception:
+        with open(token_path) as f:
+            if f.read() == data:
+                return
+    except OSError:
         pass
 
-    if creds and creds.expired and creds.refresh_token:
-        creds.refresh(Request())
-    elif not creds or not creds.valid:
-        flow = InstalledAppFlow.from_client_secrets_file(config.CREDENTIALS_PATH, config.GOOGLE_SCOPES)
-        creds = flow.run_local_server(port=0)
+    tmp_path = f"{token_path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(data)
+    os.replace(tmp_path, token_path)
+
+
+def get_credentials() -> Credentials:
+    """Return valid Google OAuth2 credentials for the active token file,
+    refreshing or running the interactive flow as needed."""
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
+    token_path = _active_token_path
+    with _creds_lock:
+        creds = _creds.get(token_path)
+        if creds is not None and creds.valid:
+            return creds
 
-    # Persist for next run
-    with open(config.TOKEN_PATH, "w") as f:
-        f.write(creds.to_json())
+        # Reuse saved token if available
+        if creds is None:
+            try:
+                creds = Credentials.from_authorized_user_file(token_path, config.GOOGLE_SCOPES)
+            except Exception:
+                pass
 
-    return creds
+        if creds and creds.expired and creds.refresh_token:
+            creds.refresh(Request())
+        elif not creds or not creds.valid:
+            flow = InstalledAppFlow.from_client_secrets_file(config.CREDENTIALS_PATH, config.GOOGLE_SCOPES)
+            creds = flow.run_local_server(port=0)
+
+        # Persist for next run
+        _save_token(creds, token_path)
+
+        _creds[token_path] = creds
+        return creds
+
+
+def _discovery_doc(api: str, version: str) -> str:
+    """Return the discovery document for *api*/*version*.
+
+    Looked up once per process: first the copy bundled with
+    google-api-python-client, then the on-disk cache, then the network
+    (which refills the on-disk cache).
+    """
+    from googleapiclient import discovery_cache
+    from googleapiclient.discovery import V2_DISCOVERY_URI
+
+    key = (api, version)
+    with _discovery_lock:
+        if key in _discovery_docs:
+            return _discovery_docs[key]
+
+        doc = discovery_cache.get_static_doc(api, version)
+        cache_path = os.path.join(config.DISCOVERY_CACHE_DIR, f"{api}.{version}.json")
+        if doc is None and os.path.exists(cache_path):
+            with open(cache_path) as f:
+                doc = f.read()
+        if doc is None:
+            import urllib.request
+
+            url = V2_DISCOVERY_URI.format(api=api, apiVersion=version)
+            with urllib.request.urlopen(url) as resp:
+                doc = resp.read().decode("utf-8")
+            os.makedirs(config.DISCOVERY_CACHE_DIR, exist_ok=True)
+            with open(cache_path, "w") as f:
+                f.write(doc)
+
+        _discovery_docs[key] = doc
+        return doc
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Whether *error* is a Google API quota / rate-limit rejection (429, or
+    403 with a rateLimitExceeded / userRateLimitExceeded reason)."""
+    status = getattr(getattr(error, "resp", None), "status", None)
+    if status == 429:
+        return True
+    content = getattr(error, "content", b"") or b""
+    return status == 403 and b"ateLimitExceeded" in content
 
 
 def build_service(api: str, version: str):
-    """Build and return a Google API service client."""
+    """Return a Google API service client, reused within the calling thread."""
+    from googleapiclient.discovery import build_from_document
+
+    services = getattr(_local, "services", None)
+    if services is None:
+        services = _local.services = {}
+
     creds = get_credentials()
-    return build(api, version, credentials=creds)
+    key = (_active_token_path, api, version)
+    cached = services.get(key)
+    if cached is None or cached[0] is not creds:
+        service = build_from_document(_discovery_doc(api, version), credentials=creds)
+        cached = services[key] = (creds, service)
+    return cached[1]
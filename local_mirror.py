@@ -0,0 +1,246 @@
+"""Local SQLite mirror of the Snowflake tables the prep run reads.
+
+``python main.py sync`` snapshots our book of accounts — the contact
+domain → account map, the product catalog, and the overview,
+subscriptions, opportunities, upsell and usage rows of every account we
+meet with — into ``MIRROR_PATH``.  With ``DATA_BACKEND=mirror`` (or
+``--data-backend mirror``) the ``snowflake_client`` public helpers answer
+from this file instead, so a weekly run needs no SSO or warehouse.
+
+Tables keep the Snowflake column names, and reads use the same ordering as
+the Snowflake queries, so callers get identically shaped rows.
+"""
+
+from __future__ import annotations
+
+import datetime
+import decimal
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+
+import config
+
+_lock = threading.Lock()
+
+# section → (table, account-id column, columns, ORDER BY, keep the id column in returned rows)
+_SECTIONS = {
+    "subscriptions": (
+        "subscriptions", "ACCOUNT_ID", ["PRODUCT_NAME", "ARR_DOLLARS", "STATUS"], "ARR_DOLLARS DESC", False,
+    ),
+    "opportunities": (
+        "opportunities", "ACCOUNT_ID", ["NAME", "STAGE_NAME", "AMOUNT", "NEXT_STEP", "CLOSE_DATE"],
+        "CLOSE_DATE ASC", False,
+    ),
+    "upsell_signals": (
+        "upsell_signals", "CORPORATION_ID", ["PRODUCT_NAME", "MOST_RECENT_SCHEDULE_CALL_DATE"],
+        "MOST_RECENT_SCHEDULE_CALL_DATE DESC", True,
+    ),
+    "product_usage": (
+        "product_usage", "ACCOUNT_ID", ["USAGE_CATEGORY", "COUNT_EVENTS"], "COUNT_EVENTS DESC", False,
+    ),
+}
+_OVERVIEW_COLUMNS = ["ACCOUNT_ID", "ACCOUNT_NAME", "ACCOUNT_STATUS", "CHURN_SCORE", "SEGMENT"]
+_CATALOG_COLUMNS = ["PRODUCT_NAME", "FAMILY", "PRODUCT_LINE_C"]
+
+
+class AccountsNotMirrored(LookupError):
+    """The domain map resolves to accounts whose rows were never synced."""
+
+    def __init__(self, account_ids: list[str]):
+        self.account_ids = account_ids
+        super().__init__(
+            f"{len(account_ids)} account(s) are not in the local mirror ({', '.join(account_ids)}); "
+            "run `python main.py sync` to add them"
+        )
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(config.MIRROR_PATH, timeout=30)
+    conn.executescript(
+        f"""
+        CREATE TABLE IF NOT EXISTS contact_domains (
+            DOMAIN     TEXT PRIMARY KEY,
+            ACCOUNT_ID TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS accounts (
+            ACCOUNT_ID     TEXT PRIMARY KEY,
+            ACCOUNT_NAME, ACCOUNT_STATUS, CHURN_SCORE, SEGMENT,
+            HAS_OVERVIEW   INTEGER NOT NULL,
+            SYNCED_AT      REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS products ({", ".join(_CATALOG_COLUMNS)});
+        CREATE TABLE IF NOT EXISTS sync_state (KEY TEXT PRIMARY KEY, VALUE REAL);
+        """
+        + "".join(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} ({id_col} TEXT NOT NULL, {", ".join(columns)});
+            CREATE INDEX IF NOT EXISTS {table}_by_account ON {table} ({id_col});
+            """
+            for table, id_col, columns, _, _ in _SECTIONS.values()
+        )
+    )
+    return conn
+
+
+def _value(value):
+    """Convert Snowflake result types SQLite cannot store."""
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def _placeholders(values: list) -> str:
+    return ", ".join("?" for _ in values)
+
+
+# ---------------------------------------------------------------------------
+# Writes (from ``snowflake_client.sync_mirror``)
+# ---------------------------------------------------------------------------
+
+def store_domains(resolved: dict[str, str]) -> None:
+    """Replace the domain → account map with a full extraction."""
+    with _lock, _connect() as conn:
+        conn.execute("DELETE FROM contact_domains")
+        conn.executemany(
+            "INSERT OR REPLACE INTO contact_domains (DOMAIN, ACCOUNT_ID) VALUES (?, ?)",
+            [(d.lower(), aid) for d, aid in resolved.items() if aid],
+        )
+
+
+def store_catalog(products: list[dict]) -> None:
+    with _lock, _connect() as conn:
+        conn.execute("DELETE FROM products")
+        conn.executemany(
+            f"INSERT INTO products VALUES ({_placeholders(_CATALOG_COLUMNS)})",
+            [[_value(p.get(c)) for c in _CATALOG_COLUMNS] for p in products],
+        )
+
+
+def store_accounts(account_data: dict[str, dict]) -> None:
+    """Replace every mirrored row of the given accounts.
+
+    *account_data* maps ACCOUNT_ID to the structure returned by
+    ``snowflake_client.get_all_account_data`` (greenspace is not stored; it
+    is derived from the catalog on read).
+    """
+    if not account_data:
+        return
+    ids = list(account_data)
+    now = time.time()
+    with _lock, _connect() as conn:
+        conn.execute(f"DELETE FROM accounts WHERE ACCOUNT_ID IN ({_placeholders(ids)})", ids)
+        for table, id_col, _, _, _ in _SECTIONS.values():
+            conn.execute(f"DELETE FROM {table} WHERE {id_col} IN ({_placeholders(ids)})", ids)
+
+        for aid, data in account_data.items():
+            overview = data.get("overview") or {}
+            conn.execute(
+                f"INSERT INTO accounts VALUES ({_placeholders(_OVERVIEW_COLUMNS)}, ?, ?)",
+                [aid, *(_value(overview.get(c)) for c in _OVERVIEW_COLUMNS[1:]), int(bool(overview)), now],
+            )
+            for section, (table, id_col, columns, _, _) in _SECTIONS.items():
+                conn.executemany(
+                    f"INSERT INTO {table} ({id_col}, {', '.join(columns)}) "
+                    f"VALUES (?, {_placeholders(columns)})",
+                    [[aid, *(_value(row.get(c)) for c in columns)] for row in data.get(section, [])],
+                )
+
+
+def mark_synced() -> None:
+    """Record that a sync finished now."""
+    with _lock, _connect() as conn:
+        conn.execute("INSERT OR REPLACE INTO sync_state VALUES ('synced_at', ?)", (time.time(),))
+
+
+# ---------------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------------
+
+def last_synced() -> float | None:
+    """Epoch time of the last completed sync, or None if never synced."""
+    with _lock, _connect() as conn:
+        row = conn.execute("SELECT VALUE FROM sync_state WHERE KEY = 'synced_at'").fetchone()
+    return row[0] if row else None
+
+
+def account_sync_times() -> dict[str, float]:
+    """ACCOUNT_ID → when its rows were last mirrored."""
+    with _lock, _connect() as conn:
+        return dict(conn.execute("SELECT ACCOUNT_ID, SYNCED_AT FROM accounts").fetchall())
+
+
+def resolve_account_ids(domains: Iterable[str]) -> dict[str, str | None]:
+    domains = sorted({d.lower() for d in domains})
+    if not domains:
+        return {}
+    with _lock, _connect() as conn:
+        found = dict(conn.execute(
+            f"SELECT DOMAIN, ACCOUNT_ID FROM contact_domains WHERE DOMAIN IN ({_placeholders(domains)})",
+            domains,
+        ).fetchall())
+    return {d: found.get(d) for d in domains}
+
+
+def catalog() -> list[dict]:
+    with _lock, _connect() as conn:
+        rows = conn.execute(
+            f"SELECT {', '.join(_CATALOG_COLUMNS)} FROM products ORDER BY FAMILY, PRODUCT_NAME"
+        ).fetchall()
+    return [dict(zip(_CATALOG_COLUMNS, row)) for row in rows]
+
+
+def account_data(account_ids: list[str]) -> dict[str, dict]:
+    """Mirrored data for *account_ids*, shaped like ``get_all_account_data``.
+
+    Raises :class:`AccountsNotMirrored` if any of them was never synced,
+    rather than passing empty sections off as the account's data.
+    """
+    if not account_ids:
+        return {}
+    ids = list(account_ids)
+    with _lock, _connect() as conn:
+        synced = {row[0] for row in conn.execute(
+            f"SELECT ACCOUNT_ID FROM accounts WHERE ACCOUNT_ID IN ({_placeholders(ids)})", ids
+        )}
+    if len(synced) < len(set(ids)):
+        raise AccountsNotMirrored(sorted(set(ids) - synced))
+    result = {
+        aid: {
+            "account_id": aid,
+            "overview": None,
+            "subscriptions": [],
+            "opportunities": [],
+            "upsell_signals": [],
+            "greenspace": [],
+            "product_usage": [],
+        }
+        for aid in ids
+    }
+    with _lock, _connect() as conn:
+        for row in conn.execute(
+            f"SELECT {', '.join(_OVERVIEW_COLUMNS)} FROM accounts "
+            f"WHERE HAS_OVERVIEW = 1 AND ACCOUNT_ID IN ({_placeholders(ids)})",
+            ids,
+        ):
+            result[row[0]]["overview"] = dict(zip(_OVERVIEW_COLUMNS, row))
+
+        for section, (table, id_col, columns, order_by, keep_id) in _SECTIONS.items():
+            for row in conn.execute(
+                f"SELECT {id_col}, {', '.join(columns)} FROM {table} "
+                f"WHERE {id_col} IN ({_placeholders(ids)}) ORDER BY {order_by}",
+                ids,
+            ):
+                record = dict(zip(columns, row[1:]))
+                if keep_id:
+                    record = {id_col: row[0], **record}
+                result[row[0]][section].append(record)
+
+    products = catalog()
+    for data in result.values():
+        owned = {s["PRODUCT_NAME"] for s in data["subscriptions"]}
+        data["greenspace"] = [dict(p) for p in products if p["PRODUCT_NAME"] not in owned]
+    return result
@@ -3,19 +3,62 @@
 
 Run:
     python main.py            # full run: fetch data, summarise, write to Google Doc
+    python main.py rotate     # move old weeks from the prep doc into quarterly archives
+    python main.py sync       # snapshot our accounts into the local mirror (mirror.sqlite)
+    python main.py serve      # stay up and prep single meetings on request (see prep_server.py)
+    python main.py --data-backend mirror    # read account data from the mirror: no SSO
     python main.py --dry-run  # print summaries to stdout without writing to the Doc
+    python main.py --refresh-account-index  # rebuild the domain → account index first
+    python main.py --llm-concurrency 8      # run up to 8 Claude calls at once
+    python main.py --context-budget 4000    # cap each meeting's prompt at ~4k input tokens
+    python main.py --refresh                # ignore cached summaries (but re-cache)
+    python main.py --no-cache               # neither read nor write the summary cache
+    python main.py --resume                 # continue this week's interrupted run
+    python main.py --incremental-doc        # write each section to the Doc as it completes
+    python main.py --full-calendar-sync     # re-list the week's events instead of syncing changes
+    python main.py --team team.json         # prep every rep in the roster in one process
+    python main.py --delta-followups        # short follow-up prep for a client's later meetings
+    python main.py --differential           # update each client's last prep from what changed since
+    python main.py --profile                # print a timing breakdown and write trace.json
+    python main.py --import-time            # report startup and per-backend import cost
 """
 
 import argparse
+import itertools
+import json
+import subprocess
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from datetime import datetime, timezone
 
-import config  # noqa: F401 — forces early .env load & validation
-from calendar_client import get_client_meetings
-from gmail_client import get_recent_threads
-from snowflake_client import get_all_account_data, warm_up_connection
-from summarizer import generate_meeting_prep
-from docs_client import append_to_doc
+import config
+import local_mirror
+import prep_history
+import rate_limit
+import summary_cache
+import tracing
+from calendar_client import get_client_meetings, get_meeting
+from google_auth import active_token_path, build_service, get_credentials, use_token
+from gmail_client import get_threads_for_emails
+from snowflake_client import get_all_account_data_bulk, refresh_account_index, sync_mirror, warm_up_connection
+from context_builder import build_context
+from summarizer import (
+    FOLLOWUP_PROMPT_VERSION,
+    MODEL_ID,
+    PROMPT_VERSION,
+    build_followup_payload,
+    build_payload,
+    generate_delta_prep,
+    generate_followup_prep,
+    generate_meeting_prep,
+    last_call_usage,
+    split_sections,
+    warm_up,
+)
+from docs_client import DocWriter, _next_monday_label, append_to_doc
+from doc_rotation import rotate_doc
+from pipeline import run_pipeline
+from run_journal import RunJournal, meeting_key
 
 
 # ---------------------------------------------------------------------------
@@ -36,17 +79,13 @@ def _external_emails(meeting: dict) -> list[str]:
     return [a["email"] for a in meeting["attendees"] if a["external"]]
 
 
-def _fetch_data_for_meeting(meeting: dict) -> dict:
-    """Fetch Gmail threads and Snowflake data for a single meeting (runs in a thread)."""
-    domains = _external_domains(meeting)
-    external_emails = _external_emails(meeting)
+def _account_for(meeting: dict, account_data: dict[str, dict]) -> dict:
+    """Return the prefetched Snowflake data for the first of the meeting's
+    domains that resolves to an account (or an empty record).
 
-    # Gmail: search for each external attendee
-    all_threads: list[dict] = []
-    for email in external_emails:
-        all_threads.extend(get_recent_threads(email))
-
-    # Snowflake: query for the first domain that resolves to an account
+    *account_data* maps lower-cased email domain to the result of
+    ``get_all_account_data_bulk``.
+    """
     snowflake_data: dict = {
         "account_id": None,
         "overview": None,
@@ -56,75 +95,718 @@ def _fetch_data_for_meeting(meeting: dict) -> dict:
         "greenspace": [],
         "product_usage": [],
     }
-    for domain in domains:
-        data = get_all_account_data(domain)
-        if data["account_id"]:
+    for domain in _external_domains(meeting):
+        data = account_data.get(domain)
+        if data and data["account_id"]:
             snowflake_data = data
             break
+    return snowflake_data
 
-    return {
-        "meeting": meeting,
-        "email_threads": all_threads,
-        "snowflake_data": snowflake_data,
-    }
 
+def _fetch_data_for_meeting(meeting: dict, account_data: dict[str, dict]) -> dict:
+    """Fetch Gmail threads for a single meeting and attach its prefetched
+    Snowflake data (runs in a thread)."""
+    return _fetch_data_for_group([meeting], account_data)[0]
 
-# ---------------------------------------------------------------------------
-# Main
-# ---------------------------------------------------------------------------
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Weekly Client Meeting Prep Agent")
-    parser.add_argument("--dry-run", action="store_true", help="Print summaries without writing to Google Doc")
-    args = parser.parse_args()
+def _fetch_data_for_group(meetings: list[dict], account_data: dict[str, dict]) -> list[dict]:
+    """Fetch Gmail threads once for a group of meetings with the same client
+    and return one gathered item per meeting, all sharing that data."""
+    # Gmail: one combined search for every external attendee, deduped by thread
+    emails = [email for m in meetings for email in _external_emails(m)]
+    all_threads = get_threads_for_emails(emails)
 
-    # 1. Calendar — upcoming client meetings
-    print("Fetching upcoming client meetings …")
-    meetings = get_client_meetings()
-    if not meetings:
-        print("No client meetings found for next week.")
-        return
-    print(f"  Found {len(meetings)} meeting(s) with external attendees.\n")
+    return [
+        {
+            "meeting": meeting,
+            "email_threads": all_threads,
+            "snowflake_data": _account_for(meeting, account_data),
+        }
+        for meeting in meetings
+    ]
 
-    # 2. Gather Gmail + Snowflake data in parallel
-    print("Authenticating with Snowflake (SSO) …")
-    warm_up_connection()
-    print("  Snowflake connected.\n")
-    print("Gathering email threads and Snowflake data …")
-    gathered: list[dict] = []
-    with ThreadPoolExecutor(max_workers=4) as pool:
-        futures = {pool.submit(_fetch_data_for_meeting, m): m for m in meetings}
-        for future in as_completed(futures):
-            gathered.append(future.result())
-    print(f"  Data gathered for {len(gathered)} meeting(s).\n")
-
-    # 3. Generate Claude summaries
-    print("Generating meeting prep summaries with Claude …")
+
+def _group_meetings(meetings: list[dict], account_of) -> list[list[int]]:
+    """Group meeting indexes by client: resolved account id, or the external
+    domain set when unresolved.  Groups are ordered by their first meeting."""
+    groups: dict[str, list[int]] = {}
+    for index, meeting in enumerate(meetings):
+        key = account_of(meeting) or "|".join(sorted(_external_domains(meeting)))
+        groups.setdefault(key, []).append(index)
+    return list(groups.values())
+
+
+def _summarize(
+    item: dict,
+    read_cache: bool = True,
+    write_cache: bool = True,
+    earlier: tuple[dict, str] | None = None,
+    context_budget: int | None = None,
+    history: prep_history.RunHistory | None = None,
+) -> dict:
+    """Generate the prep summary for one gathered meeting (runs in a thread).
+
+    The meeting's data is first ranked and trimmed to *context_budget*
+    input tokens (see ``context_builder``).  With *earlier* —
+    ``(earlier_meeting, earlier_summary)`` for the same client this week —
+    only a short follow-up delta is generated.  With *history*
+    (``--differential``), a client prepped before is diffed against its
+    last prep (see ``prep_history``): unchanged, the summary is reused;
+    otherwise only the affected sections are regenerated, and the result
+    is queued as the client's new history.  Unchanged inputs are served
+    from the summary cache instead of Claude.
+    """
+    omitted: dict[str, int] = {}
+    if earlier is None:
+        context = build_context(item["meeting"], item["email_threads"], item["snowflake_data"], context_budget)
+        omitted = context["omitted"]
+        payload = build_payload(item["meeting"], context["email_threads"], context["snowflake_data"], omitted)
+        key = summary_cache.make_key(payload, MODEL_ID, PROMPT_VERSION)
+    else:
+        payload = build_followup_payload(item["meeting"], *earlier)
+        key = summary_cache.make_key(payload, MODEL_ID, FOLLOWUP_PROMPT_VERSION)
+    section = {"title": item["meeting"]["title"], "omitted": omitted, "differential": None}
+    history_key = inputs = None
+    if history is not None and earlier is None:
+        history_key = history.key(item["meeting"], item["snowflake_data"])
+        inputs = prep_history.snapshot(item["meeting"], item["email_threads"], item["snowflake_data"])
+
+    summary = summary_cache.get(key) if read_cache else None
+    if summary is not None:
+        section.update(body=summary, usage={}, cached=True)
+    elif history_key is not None:
+        section.update(_summarize_differential(item, history_key, inputs) or {})
+
+    if "body" not in section:
+        if earlier is None:
+            summary = generate_meeting_prep(
+                meeting=item["meeting"],
+                email_threads=context["email_threads"],
+                snowflake_data=context["snowflake_data"],
+                omitted=omitted,
+            )
+        else:
+            summary = generate_followup_prep(item["meeting"], *earlier)
+        section.update(body=summary, usage=last_call_usage(), cached=False)
+    # Patched or reused summaries are not full preps of this payload
+    if write_cache and not section["cached"] and section["differential"] is None:
+        summary_cache.put(key, section["body"])
+    if history_key is not None:
+        history.record(history_key, item["meeting"], inputs, section["body"])
+        # Journaled with the section, so a resumed run can record it again
+        section["history"] = {"key": history_key, "inputs": inputs}
+    return section
+
+
+def _summarize_differential(item: dict, history_key: str, inputs: dict) -> dict | None:
+    """Reuse or patch the client's previous prep; None when a full prep is needed."""
+    previous = prep_history.load(history_key)
+    if (
+        previous is None
+        or previous.get("prompt_version") != PROMPT_VERSION
+        or not set(prep_history.SECTIONS) <= split_sections(previous["summary"]).keys()
+    ):
+        return None
+
+    changes = prep_history.diff(previous["inputs"], inputs)
+    if not changes:
+        return {"body": previous["summary"], "usage": {}, "cached": False, "differential": "unchanged"}
+    stale = prep_history.stale_sections(changes)
+    try:
+        summary = generate_delta_prep(item["meeting"], previous["meeting"], previous["summary"], changes, stale)
+    except ValueError as e:
+        print(f"  WARNING: {e}; writing a full prep for {item['meeting']['title']}")
+        return None
+    return {"body": summary, "usage": last_call_usage(), "cached": False, "differential": stale}
+
+
+def _format_omitted(omitted: dict[str, int]) -> str:
+    """e.g. "; left out 187 greenspace, 4 recent_emails" (empty if nothing was)."""
+    if not omitted:
+        return ""
+    return "; left out " + ", ".join(f"{n} {section}" for section, n in omitted.items())
+
+
+def _format_differential(differential: str | list[str] | None) -> str:
+    """e.g. "updated Suggested Talking Points; " for a differential prep."""
+    if not isinstance(differential, list):
+        return ""
+    return f"updated {', '.join(differential)}; "
+
+
+def _format_usage(usage: dict) -> str:
+    return (
+        f"in={usage.get('input_tokens', 0)} out={usage.get('output_tokens', 0)} "
+        f"cache_read={usage.get('cache_read_input_tokens', 0)} "
+        f"cache_write={usage.get('cache_creation_input_tokens', 0)}"
+    )
+
+
+def _rotate(document_id: str | None = None, dry_run: bool = False) -> None:
+    print("Rotating old weeks out of the prep doc …")
+    with tracing.span("docs.rotate"):
+        labels = rotate_doc(document_id, dry_run=dry_run)
+    if not labels:
+        print("  Nothing to archive.")
+    for label in labels:
+        print(f"  {'Would archive' if dry_run else 'Archived'}: {label}")
+
+
+# Heavy third-party modules each backend loads on first use
+_BACKEND_IMPORTS = {
+    "Google APIs": ["google.oauth2.credentials", "google_auth_oauthlib.flow", "googleapiclient.discovery"],
+    "Snowflake": ["snowflake.connector"],
+    "Bedrock": ["anthropic"],
+}
+
+
+def _cold_import_ms(modules: list[str]) -> float | None:
+    """Cumulative import time of *modules* in a fresh interpreter (None if missing)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "; ".join(f"import {m}" for m in modules)],
+        capture_output=True,
+        text=True,
+        cwd=config.BASE_DIR,
+    )
+    if result.returncode != 0:
+        return None
+    total_us = 0
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        # "import time: self [us] | cumulative | imported package" — top level only
+        if len(parts) == 3 and parts[2].strip() in modules and not parts[2].startswith("  "):
+            total_us += int(parts[1])
+    return total_us / 1000
+
+
+def _report_import_times() -> None:
+    print("Cold import cost (fresh interpreter each):")
+    startup = _cold_import_ms(["main"])
+    print(f"  {'main.py (startup)':<22}{startup:>9,.0f} ms" if startup is not None else "  main.py: failed to import")
+    for subsystem, modules in _BACKEND_IMPORTS.items():
+        ms = _cold_import_ms(modules)
+        detail = f"{ms:>9,.0f} ms" if ms is not None else "   not installed"
+        print(f"  {subsystem:<22}{detail}  (loaded on first use)")
+
+
+def _load_roster(path: str) -> list[dict]:
+    """Read a team roster: a JSON list of reps, each with name, token_path,
+    doc_id and optionally calendar_ids (defaults to ["primary"])."""
+    with open(path) as f:
+        roster = json.load(f)
+    for rep in roster:
+        missing = {"name", "token_path", "doc_id"} - rep.keys()
+        if missing:
+            sys.exit(f"Roster entry {rep!r} is missing {', '.join(sorted(missing))}.")
+        rep.setdefault("calendar_ids", ["primary"])
+    return roster
+
+
+def _load_journal(args: argparse.Namespace, name: str = "") -> RunJournal | None:
+    """Open this week's run journal; returns None if a resumed run is already done.
+
+    Dry runs keep a journal of their own, so trying one out never discards
+    the checkpoint of an interrupted real run.
+    """
+    if args.dry_run:
+        name = f"{name} dry-run".strip()
+    journal = RunJournal(_next_monday_label(), name=name)
+    if args.resume:
+        journal.load()
+        if journal.written and not args.dry_run:
+            print(f"This week's run already completed and was written to the Doc ({journal.path}).")
+            return None
+        print(
+            f"Resuming: {len(journal.sections)} summary(ies) and "
+            f"{len(journal.gathered)} gathered meeting(s) checkpointed in {journal.path}.\n"
+        )
+    else:
+        journal.reset()
+    return journal
+
+
+def _pending_meetings(meetings: list[dict], journal: RunJournal) -> list[dict]:
+    """Meetings whose data still has to be gathered."""
+    return [
+        m for m in meetings
+        if meeting_key(m) not in journal.gathered and meeting_key(m) not in journal.sections
+    ]
+
+
+def _fetch_account_data(args: argparse.Namespace, to_gather: list[dict]) -> dict[str, dict]:
+    """Authenticate with Snowflake (or check the local mirror) and bulk-fetch
+    every pending meeting's accounts."""
+    account_data: dict[str, dict] = {}
+    if config.DATA_BACKEND == "mirror" and to_gather:
+        synced_at = local_mirror.last_synced()
+        if synced_at is None:
+            sys.exit("The local mirror is empty; run `python main.py sync` first.")
+        age_hours = (time.time() - synced_at) / 3600
+        print(f"Using the local mirror (synced {age_hours:.1f} h ago).")
+        if age_hours > config.MIRROR_MAX_AGE_HOURS:
+            print("  WARNING: the mirror is stale; run `python main.py sync` to refresh it.")
+        print()
+    elif to_gather or args.refresh_account_index:
+        print("Authenticating with Snowflake (SSO) …")
+        with tracing.span("snowflake.connect"):
+            warm_up_connection()
+        print("  Snowflake connected.\n")
+    if args.refresh_account_index:
+        print("Refreshing domain → account index …")
+        print(f"  Indexed {refresh_account_index()} domain(s).\n")
+    if to_gather:
+        print(f"Fetching {config.DATA_BACKEND} data for all client accounts …")
+        all_domains = set().union(*(_external_domains(m) for m in to_gather))
+        with tracing.span("snowflake.prefetch", domains=len(all_domains)):
+            try:
+                account_data = get_all_account_data_bulk(all_domains)
+            except local_mirror.AccountsNotMirrored as e:
+                sys.exit(f"{e}.")
+        resolved = {d["account_id"] for d in account_data.values() if d["account_id"]}
+        print(f"  {len(resolved)} account(s) resolved from {len(all_domains)} domain(s).\n")
+    return account_data
+
+
+def _prepare_week(
+    args: argparse.Namespace,
+    meetings: list[dict],
+    journal: RunJournal,
+    account_data: dict[str, dict],
+    document_id: str | None = None,
+) -> None:
+    """Gather, summarize and write one prep doc's week of *meetings*."""
+    # Stream each meeting through gather → summarize as soon as it is ready
+    print(
+        f"Gathering email threads and generating summaries with Claude "
+        f"(up to {args.llm_concurrency} at once) …"
+    )
     sections: list[dict] = []
-    for item in gathered:
-        summary = generate_meeting_prep(
-            meeting=item["meeting"],
-            email_threads=item["email_threads"],
-            snowflake_data=item["snowflake_data"],
+    completed = itertools.count(1)
+    history = prep_history.RunHistory(active_token_path()) if args.differential else None
+    writer = DocWriter(document_id) if args.incremental_doc and not args.dry_run else None
+
+    def _emit(index: int, section: dict) -> None:
+        sections.append(section)
+        if writer is None:
+            return
+        if "week-header" not in journal.written_keys:
+            writer.add_week_header(_next_monday_label())
+            writer.flush()
+            journal.record_written("week-header")
+        key = meeting_key(meetings[index])
+        if key not in journal.written_keys:
+            writer.add_section(section)
+            writer.flush()
+            journal.record_written(key)
+
+    def _account_of(meeting: dict) -> str | None:
+        item = journal.gathered.get(meeting_key(meeting))
+        data = item["snowflake_data"] if item else _account_for(meeting, account_data)
+        return data["account_id"]
+
+    # Meetings with the same client share one gather (and, with
+    # --delta-followups, later ones get a short delta instead of a full prep)
+    groups = _group_meetings(meetings, _account_of)
+    print(f"  {len(meetings)} meeting(s) across {len(groups)} client(s).")
+
+    def _gather_group(indexes: list[int]) -> list[list[tuple[int, dict]]]:
+        group = [meetings[i] for i in indexes]
+        todo = [
+            m for m in group
+            if meeting_key(m) not in journal.sections and meeting_key(m) not in journal.gathered
+        ]
+        if todo:
+            with tracing.span("gather", meeting=todo[0]["title"], meetings=len(todo)):
+                gathered = _fetch_data_for_group(todo, account_data)
+            for meeting, item in zip(todo, gathered):
+                journal.record_gathered(meeting_key(meeting), item)
+        items = [(i, journal.gathered.get(meeting_key(meetings[i])) or {"meeting": meetings[i]}) for i in indexes]
+        if args.delta_followups and len(items) > 1:
+            return [items]  # one chained task: later meetings build on the first
+        return [[pair] for pair in items]
+
+    def _summarize_and_report(item: dict, earlier: tuple[dict, str] | None) -> dict:
+        key = meeting_key(item["meeting"])
+        section = journal.sections.get(key)
+        if section is not None:
+            if history is not None and section.get("history"):
+                journaled = section["history"]
+                history.record(journaled["key"], item["meeting"], journaled["inputs"], section["body"])
+            print(f"  ✓ [{next(completed)}/{len(meetings)}] {section['title']}  (resumed)")
+            return section
+        with tracing.span("summarize", meeting=item["meeting"]["title"]) as span:
+            section = _summarize(
+                item,
+                read_cache=not (args.no_cache or args.refresh),
+                write_cache=not args.no_cache,
+                earlier=earlier,
+                context_budget=args.context_budget,
+                history=history,
+            )
+            span.set(cached=section["cached"], followup=earlier is not None)
+        journal.record_section(key, section)
+        if section["cached"]:
+            detail = "cached"
+        elif section.get("differential") == "unchanged":
+            detail = "unchanged since last prep"
+        else:
+            detail = _format_usage(section["usage"])
+        kind = "follow-up, " if earlier else _format_differential(section.get("differential"))
+        print(
+            f"  ✓ [{next(completed)}/{len(meetings)}] {section['title']}  "
+            f"({kind}{detail}{_format_omitted(section.get('omitted'))})"
         )
-        sections.append({
-            "title": item["meeting"]["title"],
-            "body": summary,
-        })
-        print(f"  ✓ {item['meeting']['title']}")
+        return section
+
+    def _summarize_task(task: list[tuple[int, dict]]):
+        earlier = None
+        for index, item in task:
+            section = _summarize_and_report(item, earlier)
+            if earlier is None:
+                earlier = (item["meeting"], section["body"])
+            yield index, section
 
-    # 4. Output
+    run_pipeline(
+        groups,
+        gather=_gather_group,
+        summarize=_summarize_task,
+        emit=_emit,
+        total=len(meetings),
+        # Each backend's limiter caps the calls actually in flight
+        gather_workers=config.GMAIL_MAX_CONCURRENCY,
+        summarize_workers=args.llm_concurrency,
+        queue_size=2 * max(1, args.llm_concurrency),
+    )
+    if history is not None:
+        history.save(PROMPT_VERSION)
+    totals: dict[str, int] = {}
+    for s in sections:
+        for key, value in s["usage"].items():
+            totals[key] = totals.get(key, 0) + value
+    cached = sum(1 for s in sections if s["cached"])
+    print(f"  Token usage: {_format_usage(totals)}; {cached} summary(ies) served from cache")
+    throttling = rate_limit.summary()
+    if throttling:
+        print(f"  Rate limits: {throttling}")
+    print()
+    if not args.no_cache:
+        summary_cache.prune()
+
+    # Output
     if args.dry_run:
         print("\n--- DRY RUN (not writing to Google Doc) ---\n")
         for s in sections:
             print(f"=== {s['title']} ===")
             print(s["body"])
             print()
+    elif writer is not None:
+        journal.record_written()
+        print("Done. Sections were appended to your Google Doc as they completed.")
     else:
         print("\nAppending to Google Doc …")
-        append_to_doc(sections)
+        append_to_doc(sections, document_id)
+        journal.record_written()
         print("Done. Check your Google Doc for the updated prep notes.")
 
+    if not args.dry_run and config.DOC_AUTO_ROTATE:
+        print()
+        _rotate(document_id)
+
+
+def _run_team(args: argparse.Namespace) -> None:
+    """Prep every rep's week in one process.
+
+    Calendars are read per rep, then every rep's pending accounts are fetched
+    from Snowflake in one bulk pass over a single session, so shared client
+    accounts (and the product catalog) are queried once for the whole team.
+    Each rep keeps their own Google token, run journal and prep doc.
+    """
+    roster = _load_roster(args.team)
+    weeks: list[tuple[dict, list[dict], RunJournal]] = []
+    for rep in roster:
+        print(f"[{rep['name']}] Fetching upcoming client meetings …")
+        use_token(rep["token_path"])
+        journal = _load_journal(args, name=rep["name"])
+        if journal is None:
+            continue
+        with tracing.span("calendar", rep=rep["name"]):
+            meetings = get_client_meetings(rep["calendar_ids"], full_sync=args.full_calendar_sync)
+        print(f"  Found {len(meetings)} meeting(s) with external attendees.\n")
+        if meetings:
+            weeks.append((rep, meetings, journal))
+
+    to_gather = [m for _, meetings, journal in weeks for m in _pending_meetings(meetings, journal)]
+    account_data = _fetch_account_data(args, to_gather)
+
+    for rep, meetings, journal in weeks:
+        print(f"[{rep['name']}] Preparing {len(meetings)} meeting(s) …")
+        use_token(rep["token_path"])
+        _prepare_week(args, meetings, journal, account_data, document_id=rep["doc_id"])
+        print()
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Weekly Client Meeting Prep Agent")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        default="run",
+        choices=["run", "rotate", "sync", "serve"],
+        help=(
+            "run: prepare next week (default); rotate: archive old weeks of the prep doc; "
+            "sync: snapshot our accounts from Snowflake into the local mirror; "
+            "serve: keep backends warm and prep single meetings over local HTTP"
+        ),
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=config.SERVE_PORT,
+        help=f"With serve: local port to listen on (default {config.SERVE_PORT})",
+    )
+    parser.add_argument(
+        "--data-backend",
+        choices=["snowflake", "mirror"],
+        default=config.DATA_BACKEND,
+        help=f"Read account data live from Snowflake or from the local mirror (default {config.DATA_BACKEND})",
+    )
+    parser.add_argument(
+        "--full-mirror-sync",
+        action="store_true",
+        help="With sync: re-fetch every mirrored account, not just new or stale ones",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Print summaries without writing to Google Doc")
+    parser.add_argument(
+        "--refresh-account-index",
+        action="store_true",
+        help="Rebuild the local domain → account index from Snowflake before the run",
+    )
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=config.LLM_CONCURRENCY,
+        help=f"Max concurrent Claude calls (default {config.LLM_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--context-budget",
+        type=int,
+        default=config.CONTEXT_TOKEN_BUDGET,
+        metavar="TOKENS",
+        help=(
+            f"Estimated input tokens allowed per meeting prompt; 0 = no limit, not even the per-section "
+            f"row caps (default {config.CONTEXT_TOKEN_BUDGET})"
+        ),
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the summary cache")
+    parser.add_argument("--refresh", action="store_true", help="Regenerate every summary, then update the cache")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            "Reuse this week's checkpointed data and summaries; only redo unfinished meetings "
+            "(dry runs checkpoint separately)"
+        ),
+    )
+    parser.add_argument(
+        "--incremental-doc",
+        action="store_true",
+        help="Append each meeting's section to the Google Doc as soon as it is ready (in calendar order)",
+    )
+    parser.add_argument(
+        "--full-calendar-sync",
+        action="store_true",
+        help="Re-list next week's events instead of only pulling changes since the last run",
+    )
+    parser.add_argument(
+        "--delta-followups",
+        action="store_true",
+        help="For a client's later meetings this week, generate a short follow-up instead of a full prep",
+    )
+    parser.add_argument(
+        "--differential",
+        action="store_true",
+        help="Diff each client against its last prep: reuse it if unchanged, else regenerate only affected sections",
+    )
+    parser.add_argument(
+        "--team",
+        metavar="ROSTER_JSON",
+        help="Prep every rep in the roster (name, token_path, doc_id, calendar_ids) in one process",
+    )
+    parser.add_argument(
+        "--import-time",
+        action="store_true",
+        help="Report how long startup and each backend's imports take, then exit",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="trace.json",
+        metavar="TRACE_JSON",
+        help="Print a timing breakdown after the run and write a Chrome trace (default trace.json)",
+    )
+    return parser
+
+
+def main() -> None:
+    args = _build_parser().parse_args()
+
+    if args.import_time:
+        _report_import_times()
+        return
+
+    if args.profile:
+        tracing.enable()
+    try:
+        with tracing.span("run"):
+            _run(args)
+    finally:
+        if args.profile:
+            tracing.report()
+            tracing.dump_chrome_trace(args.profile)
+            print(f"\nTrace written to {args.profile} (open in chrome://tracing or ui.perfetto.dev).")
+
+
+def _sync(args: argparse.Namespace) -> None:
+    """Refresh the local mirror for the accounts on next week's calendar(s)."""
+    reps = _load_roster(args.team) if args.team else [None]
+    domains: set[str] = set()
+    for rep in reps:
+        prefix = f"[{rep['name']}] " if rep else ""
+        print(f"{prefix}Fetching upcoming client meetings …")
+        if rep:
+            use_token(rep["token_path"])
+        with tracing.span("calendar"):
+            meetings = get_client_meetings(rep["calendar_ids"] if rep else None, full_sync=args.full_calendar_sync)
+        domains.update(*(_external_domains(m) for m in meetings))
+
+    print("Authenticating with Snowflake (SSO) …")
+    with tracing.span("snowflake.connect"):
+        warm_up_connection()
+    print(f"Syncing the local mirror ({len(domains)} client domain(s) this week) …")
+    with tracing.span("snowflake.sync"):
+        counts = sync_mirror(domains, full=args.full_mirror_sync)
+    print(
+        f"  {counts['domains']} domain(s) mapped; {counts['fetched']} of {counts['accounts']} "
+        f"account(s) fetched into {config.MIRROR_PATH}."
+    )
+
+
+def _serve(args: argparse.Namespace) -> None:
+    """Warm every backend once, then prep single meetings on request."""
+    import prep_server
+
+    print("Warming up …")
+    if config.DATA_BACKEND == "mirror":
+        if local_mirror.last_synced() is None:
+            sys.exit("The local mirror is empty; run `python main.py sync` first.")
+    else:
+        print("  Authenticating with Snowflake (SSO) …")
+        warm_up_connection()
+    print("  Authenticating with Google …")
+    get_credentials()
+    for api, version in (("calendar", "v3"), ("gmail", "v1")):
+        build_service(api, version)  # loads each discovery document once
+    warm_up()
+    print("  Ready.\n")
+
+    def _prep(meeting: dict, refresh: bool) -> dict:
+        account_data = get_all_account_data_bulk(
+            _external_domains(meeting), max_age=config.SERVE_ACCOUNT_MAX_AGE_MINUTES * 60
+        )
+        with tracing.span("gather", meeting=meeting["title"]):
+            item = _fetch_data_for_meeting(meeting, account_data)
+        with tracing.span("summarize", meeting=meeting["title"]):
+            section = _summarize(
+                item,
+                read_cache=not (args.no_cache or refresh),
+                write_cache=not args.no_cache,
+                context_budget=args.context_budget,
+            )
+        return {
+            "meeting": {k: meeting[k] for k in ("id", "title", "start")},
+            "account_id": item["snowflake_data"]["account_id"],
+            "email_threads": len(item["email_threads"]),
+            **section,
+        }
+
+    def _prep_event(event_id: str, refresh: bool) -> dict:
+        meeting = get_meeting(event_id)
+        if meeting is None:
+            raise prep_server.PrepNotFound(
+                f"No event {event_id!r} with external attendees on {', '.join(config.CALENDAR_IDS)}"
+            )
+        return _prep(meeting, refresh)
+
+    def _prep_domain(domain: str, refresh: bool) -> dict:
+        domain = domain.strip().lower().lstrip("@")
+        if domain == config.COMPANY_DOMAIN:
+            raise prep_server.PrepNotFound(f"{domain} is our own domain")
+        # A stand-in meeting dated today (so the summary cache can serve
+        # repeats); Gmail matches the bare domain as from:/to:
+        today = datetime.now(timezone.utc).date().isoformat()
+        meeting = {
+            "id": None,
+            "title": f"{domain} (on-demand prep)",
+            "start": today,
+            "end": today,
+            "attendees": [{"email": domain, "name": f"anyone at {domain}", "external": True}],
+        }
+        return _prep(meeting, refresh)
+
+    prep_server.serve({"event": _prep_event, "domain": _prep_domain}, port=args.port, workers=config.SERVE_WORKERS)
+
+
+def _run(args: argparse.Namespace) -> None:
+    config.DATA_BACKEND = args.data_backend
+    rate_limit.configure("bedrock", args.llm_concurrency)
+    if args.command == "sync":
+        _sync(args)
+        return
+    if args.command == "serve":
+        _serve(args)
+        return
+
+    if args.team:
+        if args.command == "rotate":
+            for rep in _load_roster(args.team):
+                use_token(rep["token_path"])
+                print(f"[{rep['name']}]", end=" ")
+                _rotate(rep["doc_id"], dry_run=args.dry_run)
+        else:
+            _run_team(args)
+        return
+
+    if args.command == "rotate":
+        _rotate(dry_run=args.dry_run)
+        return
+
+    # Fail before the slow gather rather than when the results are written
+    if not args.dry_run:
+        config.require("Google Docs", "GOOGLE_DOC_ID")
+
+    journal = _load_journal(args)
+    if journal is None:
+        return
+
+    # 1. Calendar — upcoming client meetings
+    print("Fetching upcoming client meetings …")
+    with tracing.span("calendar"):
+        meetings = get_client_meetings(full_sync=args.full_calendar_sync)
+    if not meetings:
+        print("No client meetings found for next week.")
+        return
+    print(f"  Found {len(meetings)} meeting(s) with external attendees.\n")
+
+    # 2. Snowflake data for every meeting's accounts in one bulk pass
+    account_data = _fetch_account_data(args, _pending_meetings(meetings, journal))
+
+    # 3. Gather, summarize and write the week
+    _prepare_week(args, meetings, journal, account_data)
+
 
 if __name__ == "__main__":
     main()
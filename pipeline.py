@@ -0,0 +1,138 @@
+"""Streaming gather → summarize → emit pipeline.
+
+Each meeting moves to the next stage as soon as it is ready instead of
+waiting for the whole week at a stage barrier, so end-to-end wall time
+approaches the slower of the two stages rather than their sum.  Bounded
+queues between stages keep memory (and Bedrock backlog) in check, and the
+emit stage re-orders results so output still follows calendar order.
+
+The stages are not one-to-one: one gathered item (e.g. all of an account's
+meetings) may fan out into several summarize tasks, and each task yields
+``(position, result)`` pairs for any output positions it covers.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from collections.abc import Callable, Iterable
+
+_DONE = object()
+_POLL_SECONDS = 0.1
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """Block until *item* is queued or the pipeline is stopped."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    """Block until an item is available; returns _DONE if the pipeline stops."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=_POLL_SECONDS)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def run_pipeline(
+    items: Iterable,
+    gather: Callable[[object], Iterable],
+    summarize: Callable[[object], Iterable[tuple[int, object]]],
+    emit: Callable[[int, object], None],
+    *,
+    total: int,
+    gather_workers: int = 4,
+    summarize_workers: int = 4,
+    queue_size: int = 8,
+) -> None:
+    """Stream *items* through gather → summarize → emit.
+
+    ``gather(item)`` returns the summarize tasks for that item;
+    ``summarize(task)`` returns ``(position, result)`` pairs.  *emit* is
+    called on the calling thread for positions ``0 … total - 1``, strictly
+    in order.  *gather* and *summarize* run on their own worker threads.
+    The first exception raised by any stage stops the pipeline and is
+    re-raised here.
+    """
+    items = list(items)
+    gather_workers = max(1, gather_workers)
+    summarize_workers = max(1, summarize_workers)
+
+    stop = threading.Event()
+    errors: list[BaseException] = []
+    inbox: queue.Queue = queue.Queue()
+    gathered: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+    finished: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+
+    for item in items:
+        inbox.put(item)
+    for _ in range(gather_workers):
+        inbox.put(_DONE)
+
+    remaining_gatherers = [gather_workers]
+    counter_lock = threading.Lock()
+
+    def _gather_worker():
+        try:
+            while (item := _get(inbox, stop)) is not _DONE:
+                for task in gather(item):
+                    if not _put(gathered, task, stop):
+                        return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            with counter_lock:
+                remaining_gatherers[0] -= 1
+                last = remaining_gatherers[0] == 0
+            if last:
+                for _ in range(summarize_workers):
+                    _put(gathered, _DONE, stop)
+
+    def _summarize_worker():
+        try:
+            while (task := _get(gathered, stop)) is not _DONE:
+                for position, result in summarize(task):
+                    if not _put(finished, (position, result), stop):
+                        return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    threads = [
+        threading.Thread(target=_gather_worker, name=f"gather-{i}", daemon=True)
+        for i in range(gather_workers)
+    ] + [
+        threading.Thread(target=_summarize_worker, name=f"summarize-{i}", daemon=True)
+        for i in range(summarize_workers)
+    ]
+    for t in threads:
+        t.start()
+
+    pending: dict[int, object] = {}
+    next_position = 0
+    try:
+        while next_position < total:
+            job = _get(finished, stop)
+            if job is _DONE:
+                break
+            position, result = job
+            pending[position] = result
+            while next_position in pending:
+                emit(next_position, pending.pop(next_position))
+                next_position += 1
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+
+    if errors:
+        raise errors[0]
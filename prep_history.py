@@ -0,0 +1,235 @@
+"""Per-client record of the last prep's inputs and summary.
+
+With ``--differential`` every full prep stores a compact snapshot of what
+went into it — external attendees, email threads by id, and the account's
+overview, subscriptions, opportunities, upsell signals and usage — next to
+the summary, under ``PREP_HISTORY_DIR`` (one JSON file per mailbox and
+account).  The client's next meeting is diffed against that snapshot: an
+unchanged client reuses the previous summary verbatim, and otherwise only
+the summary sections the changes touch are regenerated (see
+``summarizer.generate_delta_prep``).
+
+A run collects its updates in a :class:`RunHistory` and saves them at the
+end, so every meeting diffs against the history as it was before the run
+and each client is recorded once, from its earliest meeting.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import config
+from calendar_client import parse_time
+
+# Row identity per tabular section
+_ROW_KEYS = {
+    "subscriptions": "PRODUCT_NAME",
+    "opportunities": "NAME",
+    "upsell_signals": "PRODUCT_NAME",
+    "product_usage": "USAGE_CATEGORY",
+}
+_OVERVIEW_FIELDS = ("ACCOUNT_NAME", "ACCOUNT_STATUS", "CHURN_SCORE", "SEGMENT")
+
+# Usage counts drift every week; only moves at least this large count as changes.
+_USAGE_CHANGE_RATIO = 0.25
+
+# New threads sent to the model per delta, newest first
+_MAX_NEW_THREADS = 15
+
+# Summary sections and the snapshot parts that feed them; any change at all
+# refreshes the talking points.
+_SECTION_INPUTS = {
+    "Account Snapshot": {"attendees", "overview", "subscriptions"},
+    "Recent Email Activity": {"threads"},
+    "Suggested Talking Points": None,
+}
+SECTIONS = tuple(_SECTION_INPUTS)
+
+
+def history_key(mailbox: str, meeting: dict, snowflake_data: dict) -> str:
+    """*mailbox* (the rep's token file — their threads are private to them)
+    plus the account id, or the external domains for an unresolved client."""
+    if snowflake_data.get("account_id"):
+        return f"{mailbox}|{snowflake_data['account_id']}"
+    domains = sorted({a["email"].split("@")[-1].lower() for a in meeting["attendees"] if a["external"]})
+    return f"{mailbox}|domains:" + ",".join(domains)
+
+
+def snapshot(meeting: dict, email_threads: list[dict], snowflake_data: dict) -> dict:
+    """Compact, JSON-round-tripped view of one meeting's inputs."""
+    overview = snowflake_data.get("overview")
+    inputs = {
+        "attendees": sorted({a["email"].lower() for a in meeting["attendees"] if a["external"]}),
+        "threads": {
+            t["id"]: {k: t.get(k, "") for k in ("subject", "date", "snippet")}
+            for t in email_threads
+            if t.get("id")
+        },
+        "overview": {f: overview.get(f) for f in _OVERVIEW_FIELDS} if overview else None,
+    }
+    for section, key in _ROW_KEYS.items():
+        inputs[section] = {row.get(key): row for row in snowflake_data.get(section) or []}
+    # Dates and decimals become strings here exactly as they will on disk
+    return json.loads(json.dumps(inputs, default=str))
+
+
+def _path(key: str) -> str:
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:24]
+    return os.path.join(config.PREP_HISTORY_DIR, f"{digest}.json")
+
+
+def load(key: str) -> dict | None:
+    """The last recorded prep for *key*: meeting, inputs, summary, prompt_version."""
+    try:
+        with open(_path(key)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save(key: str, meeting: dict, inputs: dict, summary: str, prompt_version: str) -> None:
+    """Record the prep just produced for *key* (atomically, safe across threads)."""
+    os.makedirs(config.PREP_HISTORY_DIR, exist_ok=True)
+    path = _path(key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({
+            "created_at": time.time(),
+            "meeting": {"title": meeting["title"], "start": meeting["start"]},
+            "inputs": inputs,
+            "summary": summary,
+            "prompt_version": prompt_version,
+        }, f, default=str)
+    os.replace(tmp_path, path)
+
+
+def _start(meeting: dict) -> datetime:
+    return parse_time(meeting["start"])
+
+
+class RunHistory:
+    """History updates made by one run for one mailbox, saved by :meth:`save`."""
+
+    def __init__(self, mailbox: str):
+        self.mailbox = mailbox
+        self._pending: dict[str, tuple[dict, dict, str]] = {}
+        self._lock = threading.Lock()
+
+    def key(self, meeting: dict, snowflake_data: dict) -> str:
+        return history_key(self.mailbox, meeting, snowflake_data)
+
+    def record(self, key: str, meeting: dict, inputs: dict, summary: str) -> None:
+        """Queue *summary* as *key*'s history unless an earlier meeting already was."""
+        with self._lock:
+            queued = self._pending.get(key)
+            if queued is None or _start(meeting) < _start(queued[0]):
+                self._pending[key] = (meeting, inputs, summary)
+
+    def save(self, prompt_version: str) -> int:
+        """Write every queued update; returns how many were written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for key, (meeting, inputs, summary) in pending.items():
+            save(key, meeting, inputs, summary, prompt_version)
+        return len(pending)
+
+
+# ---------------------------------------------------------------------------
+# Diffing
+# ---------------------------------------------------------------------------
+
+def _number(value) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _field_changes(before: dict, after: dict) -> dict:
+    return {
+        field: {"before": before.get(field), "after": after.get(field)}
+        for field in dict.fromkeys([*before, *after])
+        if before.get(field) != after.get(field)
+    }
+
+
+def _usage_moved(before: dict, after: dict) -> bool:
+    old, new = _number(before.get("COUNT_EVENTS")), _number(after.get("COUNT_EVENTS"))
+    if old is None or new is None:
+        return old != new
+    return abs(new - old) >= _USAGE_CHANGE_RATIO * max(abs(old), 1)
+
+
+def _rows_diff(section: str, before: dict, after: dict) -> dict:
+    added = [row for key, row in after.items() if key not in before]
+    removed = [key for key in before if key not in after]
+    changed = {}
+    for key in after.keys() & before.keys():
+        if section == "product_usage" and not _usage_moved(before[key], after[key]):
+            continue
+        fields = _field_changes(before[key], after[key])
+        if fields:
+            changed[key] = fields
+    return {k: v for k, v in (("added", added), ("removed", removed), ("changed", changed)) if v}
+
+
+def _total_arr(subscriptions: dict) -> float:
+    return sum(_number(row.get("ARR_DOLLARS")) or 0.0 for row in subscriptions.values())
+
+
+def diff(before: dict, after: dict) -> dict:
+    """What changed between two snapshots; empty if nothing material did.
+
+    Keys (each present only when non-empty): attendees ({added, removed}),
+    threads ({new, more_new, dropped}), overview ({field: {before, after}}),
+    and per tabular section {added, removed, changed}; subscriptions also
+    carry total_arr ({before, after}) when it moved.
+    """
+    changes: dict = {}
+
+    attendees = {
+        "added": [a for a in after["attendees"] if a not in before["attendees"]],
+        "removed": [a for a in before["attendees"] if a not in after["attendees"]],
+    }
+    if attendees["added"] or attendees["removed"]:
+        changes["attendees"] = {k: v for k, v in attendees.items() if v}
+
+    new = [t for tid, t in after["threads"].items() if tid not in before["threads"]]
+    dropped = [t["subject"] for tid, t in before["threads"].items() if tid not in after["threads"]]
+    if new or dropped:
+        threads: dict = {}
+        if new:
+            threads["new"] = new[:_MAX_NEW_THREADS]
+            if len(new) > _MAX_NEW_THREADS:
+                threads["more_new"] = len(new) - _MAX_NEW_THREADS
+        if dropped:
+            threads["dropped"] = dropped
+        changes["threads"] = threads
+
+    overview = _field_changes(before["overview"] or {}, after["overview"] or {})
+    if overview:
+        changes["overview"] = overview
+
+    for section in _ROW_KEYS:
+        rows = _rows_diff(section, before[section], after[section])
+        if section == "subscriptions":
+            arr_before, arr_after = _total_arr(before[section]), _total_arr(after[section])
+            if arr_before != arr_after:
+                rows["total_arr"] = {"before": arr_before, "after": arr_after}
+        if rows:
+            changes[section] = rows
+    return changes
+
+
+def stale_sections(changes: dict) -> list[str]:
+    """Summary sections that *changes* make out of date, in summary order."""
+    return [
+        title
+        for title, inputs in _SECTION_INPUTS.items()
+        if changes and (inputs is None or inputs & changes.keys())
+    ]
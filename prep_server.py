@@ -0,0 +1,114 @@
+"""Local HTTP endpoint for on-demand single-meeting prep (``python main.py serve``).
+
+The serving process keeps its Snowflake session, Google credentials,
+Bedrock client and caches warm, so a request costs roughly one Claude call:
+
+    curl 'localhost:8765/prep?event=<calendar event id>'
+    curl 'localhost:8765/prep?domain=acme.com'
+    curl 'localhost:8765/prep?domain=acme.com&refresh=1'   # skip the summary cache
+
+Responses are JSON.  Requests are answered on a fixed pool of worker
+threads, so each worker's Google API clients (cached per thread) stay warm
+between requests.  This module only does the HTTP plumbing; main.py
+supplies a handler per query parameter.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import traceback
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class PrepNotFound(LookupError):
+    """The requested event or domain has nothing to prep (answered with 404)."""
+
+
+# query parameter → handler(value, refresh) returning a JSON-serializable dict
+Handlers = dict[str, Callable[[str, bool], dict]]
+
+
+def _make_handler_class(handlers: Handlers) -> type[BaseHTTPRequestHandler]:
+    class _PrepRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            url = urlsplit(self.path)
+            if url.path == "/health":
+                self._reply(200, {"status": "ok"})
+                return
+            if url.path != "/prep":
+                self._reply(404, {"error": f"unknown path {url.path}"})
+                return
+
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            targets = [name for name in handlers if params.get(name)]
+            if len(targets) != 1:
+                self._reply(400, {"error": f"pass exactly one of: {', '.join(handlers)}"})
+                return
+            name = targets[0]
+
+            start = time.perf_counter()
+            try:
+                result = handlers[name](params[name], params.get("refresh") in ("1", "true", "yes"))
+            except PrepNotFound as e:
+                self._reply(404, {"error": str(e)})
+                return
+            except Exception as e:
+                traceback.print_exc()
+                self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+                return
+            self._reply(200, {**result, "seconds": round(time.perf_counter() - start, 2)})
+
+        def _reply(self, status: int, body: dict) -> None:
+            data = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format: str, *args) -> None:
+            print(f"  {self.address_string()} {format % args}")
+
+    return _PrepRequestHandler
+
+
+class _PooledHTTPServer(HTTPServer):
+    """HTTPServer that hands each request to one of *workers* long-lived threads."""
+
+    def __init__(self, address: tuple[str, int], handler_class: type[BaseHTTPRequestHandler], workers: int):
+        super().__init__(address, handler_class)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="prep-worker")
+
+    def process_request(self, request, client_address) -> None:
+        self._pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def serve(handlers: Handlers, port: int, host: str = "127.0.0.1", workers: int = 4) -> None:
+    """Answer ``GET /prep?<name>=<value>`` with ``handlers[name]`` until interrupted.
+
+    Up to *workers* requests are handled at once; more wait for a free worker.
+    """
+    server = _PooledHTTPServer((host, port), _make_handler_class(handlers), workers)
+    print(f"Serving on http://{host}:{port}/prep?{'|'.join(f'{name}=…' for name in handlers)}  (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        server.server_close()
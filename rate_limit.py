@@ -0,0 +1,204 @@
+"""Per-backend adaptive rate limiting.
+
+Every backend gets its own :class:`Limiter`: a concurrency limit plus any
+number of token buckets (Gmail quota units, Bedrock requests and tokens
+per minute, Docs writes per minute).  :func:`call` runs one request under
+a backend's limiter and retries it when the backend throttles, with
+AIMD-style concurrency control: each success raises the limit by roughly
+one per round of requests (up to the configured maximum), each throttle
+halves it and pauses the whole backend for a jittered backoff.  Worker
+pools can therefore be sized generously; the limiters find the highest
+rate each backend accepts.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+
+import config
+
+_MAX_ATTEMPTS = 6
+_BACKOFF_BASE_SECONDS = 2.0
+_BACKOFF_CAP_SECONDS = 60.0
+
+
+class _Bucket:
+    """Token bucket refilled continuously at *rate* per second up to *capacity*."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, n: float) -> float:
+        # A request larger than the bucket waits for a full bucket, then runs
+        # the balance into debt.
+        needed = min(n, self.capacity) - self.tokens
+        return max(0.0, needed / self.rate)
+
+
+class Limiter:
+    def __init__(self, name: str, max_concurrency: int, buckets: dict[str, tuple[float, float]] | None = None):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.throttles = 0
+        self._buckets = {key: _Bucket(rate, capacity) for key, (rate, capacity) in (buckets or {}).items()}
+        self._cooldown_until = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def concurrency(self) -> int:
+        return max(1, int(self.limit))
+
+    @contextmanager
+    def slot(self, **costs: float):
+        """Hold one concurrency slot, after taking *costs* from the buckets."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = self._cooldown_until - now
+                if wait <= 0 and self.in_flight < self.concurrency:
+                    for bucket in self._buckets.values():
+                        bucket.refill(now)
+                    wait = max(
+                        (self._buckets[key].wait_time(n) for key, n in costs.items() if key in self._buckets),
+                        default=0.0,
+                    )
+                    if wait <= 0:
+                        for key, n in costs.items():
+                            if key in self._buckets:
+                                self._buckets[key].tokens -= n
+                        self.in_flight += 1
+                        break
+                # Woken early when a slot frees up or the limit is raised
+                self._cond.wait(timeout=wait if wait > 0 else None)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    def refund(self, key: str, n: float) -> None:
+        """Return *n* over-reserved units (e.g. estimated minus actual tokens)."""
+        if key in self._buckets and n > 0:
+            with self._cond:
+                bucket = self._buckets[key]
+                bucket.tokens = min(bucket.capacity, bucket.tokens + n)
+                self._cond.notify_all()
+
+    def on_success(self) -> None:
+        with self._cond:
+            if self.limit < self.max_concurrency:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+                self._cond.notify_all()
+
+    def on_throttle(self, delay: float) -> None:
+        with self._cond:
+            self.throttles += 1
+            self.limit = max(1.0, self.limit / 2)
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+
+
+def backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff delay for the *attempt*-th retry."""
+    return random.uniform(0, min(_BACKOFF_CAP_SECONDS, _BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+_limiters: dict[str, Limiter] = {}
+_overrides: dict[str, dict] = {}
+_limiters_lock = threading.Lock()
+
+
+def _build(name: str) -> Limiter:
+    overrides = _overrides.get(name, {})
+    if name == "gmail":
+        units = config.GMAIL_QUOTA_UNITS_PER_SECOND
+        return Limiter(name, overrides.get("max_concurrency", config.GMAIL_MAX_CONCURRENCY), {"units": (units, units)})
+    if name == "bedrock":
+        return Limiter(
+            name,
+            overrides.get("max_concurrency", config.LLM_CONCURRENCY),
+            {
+                "requests": (config.BEDROCK_REQUESTS_PER_MINUTE / 60, config.BEDROCK_REQUESTS_PER_MINUTE),
+                "tokens": (config.BEDROCK_TOKENS_PER_MINUTE / 60, config.BEDROCK_TOKENS_PER_MINUTE),
+            },
+        )
+    if name == "docs":
+        # Writes to one doc must stay ordered anyway
+        per_minute = config.DOCS_WRITES_PER_MINUTE
+        return Limiter(name, 1, {"writes": (per_minute / 60, max(1.0, per_minute / 6))})
+    if name == "calendar":
+        # A few listings per run: only the throttle retries matter
+        return Limiter(name, 4)
+    if name == "snowflake":
+        return Limiter(name, overrides.get("max_concurrency", config.SNOWFLAKE_MAX_CONCURRENCY))
+    raise ValueError(f"Unknown backend {name!r}")
+
+
+def get(name: str) -> Limiter:
+    """Return the process-wide limiter for backend *name*."""
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = _limiters[name] = _build(name)
+        return limiter
+
+
+def configure(name: str, max_concurrency: int) -> None:
+    """Override a backend's maximum concurrency (e.g. from --llm-concurrency)."""
+    with _limiters_lock:
+        _overrides[name] = {"max_concurrency": max_concurrency}
+        _limiters.pop(name, None)
+
+
+def call(
+    name: str,
+    fn: Callable[[], object],
+    is_throttle: Callable[[BaseException], bool] | None = None,
+    **costs: float,
+):
+    """Run ``fn()`` under backend *name*'s limiter, charging *costs*.
+
+    Errors for which *is_throttle* is true are retried with full-jitter
+    exponential backoff, halving the backend's concurrency each time.
+    """
+    limiter = get(name)
+    for attempt in range(1, _MAX_ATTEMPTS + 1):
+        with limiter.slot(**costs):
+            try:
+                result = fn()
+            except Exception as e:
+                if is_throttle is None or not is_throttle(e) or attempt == _MAX_ATTEMPTS:
+                    raise
+                delay = backoff(attempt)
+                limiter.on_throttle(delay)
+                print(
+                    f"  {name} throttled ({e.__class__.__name__}); retrying in {delay:.1f}s "
+                    f"at concurrency {limiter.concurrency} …"
+                )
+                continue
+        limiter.on_success()
+        return result
+
+
+def summary() -> str:
+    """e.g. "bedrock throttled 3× (concurrency 2/8)" for every throttled backend."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return ", ".join(
+        f"{l.name} throttled {l.throttles}× (concurrency {l.concurrency}/{l.max_concurrency})"
+        for l in limiters
+        if l.throttles
+    )
@@ -0,0 +1,99 @@
+"""Checkpoint journal for a weekly run.
+
+Every meeting's gathered data and finished summary are appended to a JSONL
+file named after the week label as soon as they are produced, so a run that
+dies partway (SSO timeout, Bedrock throttle, Docs error) can be resumed with
+``--resume`` and only redo the meetings that had not finished.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+
+import config
+
+
+def meeting_key(meeting: dict) -> str:
+    """Stable identifier for a meeting across runs in the same week."""
+    return meeting.get("id") or f"{meeting['title']}|{meeting['start']}"
+
+
+class RunJournal:
+    """Append-only record of one week's progress.
+
+    Attributes loaded from disk (and kept up to date while recording):
+        gathered  — meeting key → gathered data dict
+        sections  — meeting key → finished section dict
+        written   — True once the sections were appended to the Google Doc
+        written_keys — meeting keys (and "week-header") already written
+                       incrementally to the Google Doc
+    """
+
+    def __init__(self, week_label: str, name: str = ""):
+        slug = re.sub(r"[^a-z0-9]+", "-", f"{name} {week_label}".lower()).strip("-")
+        self.path = os.path.join(config.RUN_JOURNAL_DIR, f"{slug}.jsonl")
+        self.gathered: dict[str, dict] = {}
+        self.sections: dict[str, dict] = {}
+        self.written = False
+        self.written_keys: set[str] = set()
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Replay the journal file, if any, into memory."""
+        try:
+            with open(self.path) as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # partially written last line from a crash
+            if entry["type"] == "gathered":
+                self.gathered[entry["key"]] = entry["data"]
+            elif entry["type"] == "section":
+                self.sections[entry["key"]] = entry["data"]
+            elif entry["type"] == "written":
+                if entry.get("key"):
+                    self.written_keys.add(entry["key"])
+                else:
+                    self.written = True
+
+    def reset(self) -> None:
+        """Discard any previous journal for this week and start fresh."""
+        with self._lock:
+            self.gathered.clear()
+            self.sections.clear()
+            self.written = False
+            self.written_keys.clear()
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def _append(self, entry: dict) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock, open(self.path, "a") as f:
+            f.write(line)
+            f.flush()
+
+    def record_gathered(self, key: str, data: dict) -> None:
+        self.gathered[key] = data
+        self._append({"type": "gathered", "key": key, "data": data})
+
+    def record_section(self, key: str, section: dict) -> None:
+        self.sections[key] = section
+        self._append({"type": "section", "key": key, "data": section})
+
+    def record_written(self, key: str | None = None) -> None:
+        """Mark one incrementally written item, or (no *key*) the whole run."""
+        if key:
+            self.written_keys.add(key)
+        else:
+            self.written = True
+        self._append({"type": "written", "key": key})
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import threading
+import time
+from collections.abc import Iterable
 
-import snowflake.connector
-
+import account_index
 import config
+import local_mirror
+import rate_limit
+import tracing
 
 # ---------------------------------------------------------------------------
 # Connection helper — shared connection so SSO only prompts once
@@ -18,16 +22,26 @@ def _get_conn():
     global _shared_conn
     with _conn_lock:
         if _shared_conn is None or _shared_conn.is_closed():
+            config.require("Snowflake", "SNOWFLAKE_ACCOUNT", "SNOWFLAKE_USER", "SNOWFLAKE_WAREHOUSE")
+            import snowflake.connector  # slow to import; only needed once we connect
+
             _shared_conn = snowflake.connector.connect(
                 account=config.SNOWFLAKE_ACCOUNT,
                 user=config.SNOWFLAKE_USER,
                 authenticator="externalbrowser",
                 warehouse=config.SNOWFLAKE_WAREHOUSE,
                 database=config.SNOWFLAKE_DATABASE,
+                # serve mode keeps the session for hours
+                client_session_keep_alive=True,
             )
         return _shared_conn
 
 
+def _use_mirror() -> bool:
+    """Whether the public helpers answer from the local mirror (``DATA_BACKEND``)."""
+    return config.DATA_BACKEND == "mirror"
+
+
 def warm_up_connection():
     """Call once from the main thread to authenticate via SSO before parallel work."""
     conn = _get_conn()
@@ -49,21 +63,97 @@ def warm_up_connection():
     cur.close()
 
 
-def _query(sql: str, params: dict | None = None) -> list[dict]:
-    """Execute *sql* and return rows as a list of dicts."""
-    conn = _get_conn()
-    cur = conn.cursor()
-    cur.execute(sql, params or {})
+def _query(sql: str, params: dict | None = None, label: str = "query") -> list[dict]:
+    """Execute *sql* and return rows as a list of dicts.
+
+    *label* names the span (``snowflake.<label>``) when profiling.  At most
+    ``SNOWFLAKE_MAX_CONCURRENCY`` statements run at once.
+    """
+    with tracing.span(f"snowflake.{label}") as span:
+        conn = _get_conn()
+
+        def _run():
+            cur = conn.cursor()
+            cur.execute(sql, params or {})
+            return cur.sfqid, _rows(cur)
+
+        query_id, rows = rate_limit.call("snowflake", _run)
+        span.set(query_id=query_id, rows=len(rows))
+        return rows
+
+
+def _rows(cur) -> list[dict]:
     cols = [desc[0] for desc in cur.description]
     return [dict(zip(cols, row)) for row in cur.fetchall()]
 
 
+def _query_many(queries: dict[str, tuple[str, dict | None]]) -> dict[str, list[dict]]:
+    """Run several independent queries and return their rows keyed like *queries*.
+
+    With ``SNOWFLAKE_QUERY_MODE=async`` (the default) every statement is
+    submitted up front via ``execute_async`` on the shared SSO session and
+    the results are collected by query id, so the batch costs roughly the
+    slowest single query.  ``serial`` runs them one after another.  An
+    async batch holds one of the ``SNOWFLAKE_MAX_CONCURRENCY`` slots.
+    """
+    with tracing.span("snowflake.batch", queries=len(queries)):
+        if config.SNOWFLAKE_QUERY_MODE != "async":
+            return {name: _query(sql, params, label=name) for name, (sql, params) in queries.items()}
+        return rate_limit.call("snowflake", lambda: _run_async(queries))
+
+
+def _run_async(queries: dict[str, tuple[str, dict | None]]) -> dict[str, list[dict]]:
+    conn = _get_conn()
+    cur = conn.cursor()
+    query_ids = {}
+    for name, (sql, params) in queries.items():
+        cur.execute_async(sql, params or {})
+        query_ids[name] = cur.sfqid
+
+    # All statements run concurrently, so each span measures the wait
+    # for that result after the previous one was collected.
+    results = {}
+    for name, qid in query_ids.items():
+        with tracing.span(f"snowflake.{name}", query_id=qid) as span:
+            delay = 0.02
+            while conn.is_still_running(conn.get_query_status_throw_if_error(qid)):
+                time.sleep(delay)
+                delay = min(delay * 2, 0.5)
+            cur.get_results_from_sfqid(qid)
+            results[name] = _rows(cur)
+            span.set(rows=len(results[name]))
+    return results
+
+
+def _in_clause(prefix: str, values: Iterable) -> tuple[str, dict]:
+    """Return a ``%(prefix0)s, %(prefix1)s, …`` placeholder list and its params."""
+    params = {f"{prefix}{i}": v for i, v in enumerate(values)}
+    return ", ".join(f"%({k})s" for k in params), params
+
+
+def _group_rows(rows: list[dict], key: str, keep_key: bool = False) -> dict[str, list[dict]]:
+    """Split *rows* by their *key* column, preserving the query's row order."""
+    grouped: dict[str, list[dict]] = {}
+    for row in rows:
+        row_key = row[key] if keep_key else row.pop(key)
+        grouped.setdefault(row_key, []).append(row)
+    return grouped
+
+
 # ---------------------------------------------------------------------------
 # Public helpers — each accepts an email domain (e.g. "acme.com")
 # ---------------------------------------------------------------------------
 
 def resolve_account_id(email_domain: str) -> str | None:
-    """Map an email domain to a Salesforce ACCOUNT_ID via the Contact table."""
+    """Map an email domain to a Salesforce ACCOUNT_ID via the Contact table.
+
+    Answers from the local account index when it has a fresh entry.
+    """
+    if _use_mirror():
+        return local_mirror.resolve_account_ids([email_domain])[email_domain.lower()]
+    hit, account_id = account_index.lookup(email_domain)
+    if hit:
+        return account_id
     rows = _query(
         """
         SELECT DISTINCT c.ACCOUNT_ID
@@ -73,98 +163,270 @@ def resolve_account_id(email_domain: str) -> str | None:
         LIMIT 1
         """,
         {"pattern": f"%@{email_domain.lower()}"},
+        label="resolve",
     )
-    return rows[0]["ACCOUNT_ID"] if rows else None
+    account_id = rows[0]["ACCOUNT_ID"] if rows else None
+    account_index.store_many({email_domain: account_id})
+    return account_id
+
+
+_OVERVIEW_SQL = """
+    SELECT ACCOUNT_ID, ACCOUNT_NAME, ACCOUNT_STATUS, CHURN_SCORE, SEGMENT
+    FROM PROD_DB.DBT_MART.MART_DIM_ACCOUNTS
+    WHERE ACCOUNT_ID = %(aid)s
+    LIMIT 1
+"""
+
+_SUBSCRIPTIONS_SQL = """
+    SELECT PRODUCT_NAME, ARR_DOLLARS, STATUS
+    FROM PROD_DB.DBT_MART.MART_DIM_ZUORA_SUBSCRIPTIONS
+    WHERE ACCOUNT_ID = %(aid)s
+      AND STATUS = 'Active'
+    ORDER BY ARR_DOLLARS DESC
+"""
+
+_OPPORTUNITIES_SQL = """
+    SELECT NAME, STAGE_NAME, AMOUNT, NEXT_STEP, CLOSE_DATE
+    FROM PROD_DB.RAW_SALESFORCE_FIVETRAN.OPPORTUNITY
+    WHERE ACCOUNT_ID = %(aid)s
+      AND IS_CLOSED = FALSE
+    ORDER BY CLOSE_DATE ASC
+"""
+
+_UPSELL_SQL = """
+    SELECT CORPORATION_ID, PRODUCT_NAME, MOST_RECENT_SCHEDULE_CALL_DATE
+    FROM PROD_DB.DBT_CORE.UPSELL_CLICKS
+    WHERE CORPORATION_ID = %(aid)s
+    ORDER BY MOST_RECENT_SCHEDULE_CALL_DATE DESC
+    LIMIT 20
+"""
+
+_CATALOG_SQL = """
+    SELECT p.NAME AS PRODUCT_NAME, p.FAMILY, p.PRODUCT_LINE_C
+    FROM PROD_DB.RAW_SALESFORCE_FIVETRAN.PRODUCT_2 p
+    WHERE p.IS_ACTIVE = TRUE
+    ORDER BY p.FAMILY, p.NAME
+"""
+
+_USAGE_SQL = """
+    SELECT USAGE_CATEGORY, COUNT_EVENTS
+    FROM PROD_DB.DBT_MART.MART_DIM_PE_PRODUCT_USAGE_FRONTEND_EVENTS
+    WHERE ACCOUNT_ID = %(aid)s
+    ORDER BY COUNT_EVENTS DESC
+    LIMIT 20
+"""
+
+
+def _mirrored(account_id: str, section: str):
+    return local_mirror.account_data([account_id])[account_id][section]
 
 
 def get_account_overview(account_id: str) -> dict | None:
-    rows = _query(
-        """
-        SELECT ACCOUNT_ID, ACCOUNT_NAME, ACCOUNT_STATUS, CHURN_SCORE, SEGMENT
-        FROM PROD_DB.DBT_MART.MART_DIM_ACCOUNTS
-        WHERE ACCOUNT_ID = %(aid)s
-        LIMIT 1
-        """,
-        {"aid": account_id},
-    )
+    if _use_mirror():
+        return _mirrored(account_id, "overview")
+    rows = _query(_OVERVIEW_SQL, {"aid": account_id}, label="overview")
     return rows[0] if rows else None
 
 
 def get_active_subscriptions(account_id: str) -> list[dict]:
-    return _query(
-        """
-        SELECT PRODUCT_NAME, ARR_DOLLARS, STATUS
-        FROM PROD_DB.DBT_MART.MART_DIM_ZUORA_SUBSCRIPTIONS
-        WHERE ACCOUNT_ID = %(aid)s
-          AND STATUS = 'Active'
-        ORDER BY ARR_DOLLARS DESC
-        """,
-        {"aid": account_id},
-    )
+    if _use_mirror():
+        return _mirrored(account_id, "subscriptions")
+    return _query(_SUBSCRIPTIONS_SQL, {"aid": account_id}, label="subscriptions")
 
 
 def get_open_opportunities(account_id: str) -> list[dict]:
-    return _query(
-        """
-        SELECT NAME, STAGE_NAME, AMOUNT, NEXT_STEP, CLOSE_DATE
-        FROM PROD_DB.RAW_SALESFORCE_FIVETRAN.OPPORTUNITY
-        WHERE ACCOUNT_ID = %(aid)s
-          AND IS_CLOSED = FALSE
-        ORDER BY CLOSE_DATE ASC
-        """,
-        {"aid": account_id},
-    )
+    if _use_mirror():
+        return _mirrored(account_id, "opportunities")
+    return _query(_OPPORTUNITIES_SQL, {"aid": account_id}, label="opportunities")
 
 
 def get_upsell_signals(account_id: str) -> list[dict]:
-    return _query(
-        """
-        SELECT CORPORATION_ID, PRODUCT_NAME, MOST_RECENT_SCHEDULE_CALL_DATE
-        FROM PROD_DB.DBT_CORE.UPSELL_CLICKS
-        WHERE CORPORATION_ID = %(aid)s
-        ORDER BY MOST_RECENT_SCHEDULE_CALL_DATE DESC
-        LIMIT 20
-        """,
-        {"aid": account_id},
-    )
+    if _use_mirror():
+        return _mirrored(account_id, "upsell_signals")
+    return _query(_UPSELL_SQL, {"aid": account_id}, label="upsell_signals")
 
 
-def get_greenspace(account_id: str) -> list[dict]:
-    """Products in the active catalog that the account does NOT currently subscribe to."""
-    return _query(
-        """
-        SELECT p.NAME AS PRODUCT_NAME, p.FAMILY, p.PRODUCT_LINE_C
-        FROM PROD_DB.RAW_SALESFORCE_FIVETRAN.PRODUCT_2 p
-        WHERE p.IS_ACTIVE = TRUE
-          AND p.NAME NOT IN (
-              SELECT s.PRODUCT_NAME
-              FROM PROD_DB.DBT_MART.MART_DIM_ZUORA_SUBSCRIPTIONS s
-              WHERE s.ACCOUNT_ID = %(aid)s
-                AND s.STATUS = 'Active'
-          )
-        ORDER BY p.FAMILY, p.NAME
-        """,
-        {"aid": account_id},
-    )
+_catalog: list[dict] | None = None
+_catalog_lock = threading.Lock()
+
+
+def get_product_catalog() -> list[dict]:
+    """Return the active product catalog, fetched once per process."""
+    if _use_mirror():
+        return local_mirror.catalog()
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = _query(_CATALOG_SQL, label="catalog")
+        return _catalog
+
+
+def _greenspace_from(subscriptions: list[dict]) -> list[dict]:
+    owned = {s["PRODUCT_NAME"] for s in subscriptions}
+    return [dict(p) for p in get_product_catalog() if p["PRODUCT_NAME"] not in owned]
+
+
+def get_greenspace(account_id: str, subscriptions: list[dict] | None = None) -> list[dict]:
+    """Products in the active catalog that the account does NOT currently subscribe to.
+
+    Pass the account's already-fetched active *subscriptions* to avoid
+    re-querying them; the catalog itself is memoized.
+    """
+    if subscriptions is None:
+        subscriptions = get_active_subscriptions(account_id)
+    return _greenspace_from(subscriptions)
 
 
 def get_product_usage(account_id: str) -> list[dict]:
-    return _query(
-        """
-        SELECT USAGE_CATEGORY, COUNT_EVENTS
-        FROM PROD_DB.DBT_MART.MART_DIM_PE_PRODUCT_USAGE_FRONTEND_EVENTS
-        WHERE ACCOUNT_ID = %(aid)s
-        ORDER BY COUNT_EVENTS DESC
-        LIMIT 20
-        """,
-        {"aid": account_id},
-    )
+    if _use_mirror():
+        return _mirrored(account_id, "product_usage")
+    return _query(_USAGE_SQL, {"aid": account_id}, label="product_usage")
+
+
+# ---------------------------------------------------------------------------
+# Bulk helpers — one query per table for a whole set of accounts
+# ---------------------------------------------------------------------------
+
+_DOMAIN_ACCOUNTS_SQL = """
+    SELECT LOWER(SPLIT_PART(c.EMAIL, '@', -1)) AS DOMAIN, MIN(c.ACCOUNT_ID) AS ACCOUNT_ID
+    FROM PROD_DB.RAW_SALESFORCE_FIVETRAN.CONTACT c
+    WHERE c.ACCOUNT_ID IS NOT NULL
+      {domain_filter}
+    GROUP BY 1
+"""
+
+
+def resolve_account_ids(email_domains: Iterable[str]) -> dict[str, str | None]:
+    """Map many email domains to Salesforce ACCOUNT_IDs.
+
+    Fresh entries come from the local account index; the remaining domains
+    are resolved in a single query and written back (misses included).
+    Returns a dict keyed by lower-cased domain; unresolved domains map to None.
+    """
+    if _use_mirror():
+        return local_mirror.resolve_account_ids(email_domains)
+    domains = sorted({d.lower() for d in email_domains})
+    if not domains:
+        return {}
+    cached = account_index.lookup_many(domains)
+    misses = [d for d in domains if d not in cached]
+    if misses:
+        placeholders, params = _in_clause("d", misses)
+        rows = _query(
+            _DOMAIN_ACCOUNTS_SQL.format(
+                domain_filter=f"AND LOWER(SPLIT_PART(c.EMAIL, '@', -1)) IN ({placeholders})"
+            ),
+            params,
+            label="resolve",
+        )
+        found = {row["DOMAIN"]: row["ACCOUNT_ID"] for row in rows}
+        fetched = {d: found.get(d) for d in misses}
+        account_index.store_many(fetched)
+        cached.update(fetched)
+    return {d: cached[d] for d in domains}
+
+
+def refresh_account_index() -> int:
+    """Rebuild the local account index from one GROUP BY over every contact
+    email domain.  Returns the number of domains indexed."""
+    rows = _query(_DOMAIN_ACCOUNTS_SQL.format(domain_filter=""), label="resolve_all")
+    account_index.rebuild({row["DOMAIN"]: row["ACCOUNT_ID"] for row in rows})
+    return len(rows)
+
+
+def _fetch_account_data_bulk(account_ids: list[str]) -> dict[str, dict]:
+    """Fetch every per-account section for *account_ids* with one query per table."""
+    placeholders, params = _in_clause("a", account_ids)
+
+    results = _query_many({
+        "overviews": (
+            f"""
+            SELECT ACCOUNT_ID, ACCOUNT_NAME, ACCOUNT_STATUS, CHURN_SCORE, SEGMENT
+            FROM PROD_DB.DBT_MART.MART_DIM_ACCOUNTS
+            WHERE ACCOUNT_ID IN ({placeholders})
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY ACCOUNT_ID ORDER BY ACCOUNT_ID) = 1
+            """,
+            params,
+        ),
+        "subscriptions": (
+            f"""
+            SELECT ACCOUNT_ID, PRODUCT_NAME, ARR_DOLLARS, STATUS
+            FROM PROD_DB.DBT_MART.MART_DIM_ZUORA_SUBSCRIPTIONS
+            WHERE ACCOUNT_ID IN ({placeholders})
+              AND STATUS = 'Active'
+            ORDER BY ARR_DOLLARS DESC
+            """,
+            params,
+        ),
+        "opportunities": (
+            f"""
+            SELECT ACCOUNT_ID, NAME, STAGE_NAME, AMOUNT, NEXT_STEP, CLOSE_DATE
+            FROM PROD_DB.RAW_SALESFORCE_FIVETRAN.OPPORTUNITY
+            WHERE ACCOUNT_ID IN ({placeholders})
+              AND IS_CLOSED = FALSE
+            ORDER BY CLOSE_DATE ASC
+            """,
+            params,
+        ),
+        "upsell_signals": (
+            f"""
+            SELECT CORPORATION_ID, PRODUCT_NAME, MOST_RECENT_SCHEDULE_CALL_DATE
+            FROM PROD_DB.DBT_CORE.UPSELL_CLICKS
+            WHERE CORPORATION_ID IN ({placeholders})
+            QUALIFY ROW_NUMBER() OVER (
+                PARTITION BY CORPORATION_ID ORDER BY MOST_RECENT_SCHEDULE_CALL_DATE DESC
+            ) <= 20
+            ORDER BY MOST_RECENT_SCHEDULE_CALL_DATE DESC
+            """,
+            params,
+        ),
+        "product_usage": (
+            f"""
+            SELECT ACCOUNT_ID, USAGE_CATEGORY, COUNT_EVENTS
+            FROM PROD_DB.DBT_MART.MART_DIM_PE_PRODUCT_USAGE_FRONTEND_EVENTS
+            WHERE ACCOUNT_ID IN ({placeholders})
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY ACCOUNT_ID ORDER BY COUNT_EVENTS DESC) <= 20
+            ORDER BY COUNT_EVENTS DESC
+            """,
+            params,
+        ),
+    })
+    overviews = _group_rows(results["overviews"], "ACCOUNT_ID", keep_key=True)
+    subscriptions = _group_rows(results["subscriptions"], "ACCOUNT_ID")
+    opportunities = _group_rows(results["opportunities"], "ACCOUNT_ID")
+    upsell_signals = _group_rows(results["upsell_signals"], "CORPORATION_ID", keep_key=True)
+    product_usage = _group_rows(results["product_usage"], "ACCOUNT_ID")
+
+    return {
+        aid: {
+            "account_id": aid,
+            "overview": (overviews.get(aid) or [None])[0],
+            "subscriptions": subscriptions.get(aid, []),
+            "opportunities": opportunities.get(aid, []),
+            "upsell_signals": upsell_signals.get(aid, []),
+            "greenspace": _greenspace_from(subscriptions.get(aid, [])),
+            "product_usage": product_usage.get(aid, []),
+        }
+        for aid in account_ids
+    }
 
 
 # ---------------------------------------------------------------------------
-# Convenience wrapper
+# Convenience wrappers
 # ---------------------------------------------------------------------------
 
+def _empty_account_data() -> dict:
+    return {
+        "account_id": None,
+        "overview": None,
+        "subscriptions": [],
+        "opportunities": [],
+        "upsell_signals": [],
+        "greenspace": [],
+        "product_usage": [],
+    }
+
+
 def get_all_account_data(email_domain: str) -> dict:
     """Fetch all Snowflake data for a client identified by email domain.
 
@@ -174,22 +436,101 @@ def get_all_account_data(email_domain: str) -> dict:
     """
     account_id = resolve_account_id(email_domain)
     if not account_id:
-        return {
-            "account_id": None,
-            "overview": None,
-            "subscriptions": [],
-            "opportunities": [],
-            "upsell_signals": [],
-            "greenspace": [],
-            "product_usage": [],
-        }
+        return _empty_account_data()
+    if _use_mirror():
+        return local_mirror.account_data([account_id])[account_id]
 
+    params = {"aid": account_id}
+    results = _query_many({
+        "overview": (_OVERVIEW_SQL, params),
+        "subscriptions": (_SUBSCRIPTIONS_SQL, params),
+        "opportunities": (_OPPORTUNITIES_SQL, params),
+        "upsell_signals": (_UPSELL_SQL, params),
+        "product_usage": (_USAGE_SQL, params),
+    })
+    overview = results["overview"]
     return {
         "account_id": account_id,
-        "overview": get_account_overview(account_id),
-        "subscriptions": get_active_subscriptions(account_id),
-        "opportunities": get_open_opportunities(account_id),
-        "upsell_signals": get_upsell_signals(account_id),
-        "greenspace": get_greenspace(account_id),
-        "product_usage": get_product_usage(account_id),
+        "overview": overview[0] if overview else None,
+        "subscriptions": results["subscriptions"],
+        "opportunities": results["opportunities"],
+        "upsell_signals": results["upsell_signals"],
+        "greenspace": _greenspace_from(results["subscriptions"]),
+        "product_usage": results["product_usage"],
     }
+
+
+_account_cache: dict[str, dict] = {}
+_account_fetched_at: dict[str, float] = {}
+_account_cache_lock = threading.Lock()
+
+
+def get_all_account_data_bulk(email_domains: Iterable[str], max_age: float | None = None) -> dict[str, dict]:
+    """Fetch all Snowflake data for many email domains in a fixed number of queries.
+
+    Returns a dict mapping each lower-cased domain to the same structure as
+    :func:`get_all_account_data`.  Domains that resolve to the same account
+    share one result dict.  Accounts already fetched earlier in the process
+    (e.g. for another rep in team mode) are not queried again, unless they
+    were fetched more than *max_age* seconds ago.
+    """
+    account_ids = resolve_account_ids(email_domains)
+    unique_ids = sorted({aid for aid in account_ids.values() if aid})
+    stale_before = time.time() - max_age if max_age is not None else None
+    with _account_cache_lock:
+        missing = [
+            aid for aid in unique_ids
+            if aid not in _account_cache
+            or (stale_before is not None and _account_fetched_at.get(aid, 0) < stale_before)
+        ]
+    if missing:
+        fetched = local_mirror.account_data(missing) if _use_mirror() else _fetch_account_data_bulk(missing)
+        now = time.time()
+        with _account_cache_lock:
+            _account_cache.update(fetched)
+            _account_fetched_at.update((aid, now) for aid in fetched)
+    with _account_cache_lock:
+        return {
+            domain: _account_cache[aid] if aid else _empty_account_data()
+            for domain, aid in account_ids.items()
+        }
+
+
+# ---------------------------------------------------------------------------
+# Local mirror sync
+# ---------------------------------------------------------------------------
+
+# Keep each bulk IN list comfortably small
+_SYNC_BATCH_SIZE = 500
+
+
+def sync_mirror(email_domains: Iterable[str] = (), full: bool = False) -> dict[str, int]:
+    """Snapshot our book of accounts from Snowflake into the local mirror.
+
+    The domain → account map (one GROUP BY over every contact, which also
+    rebuilds the account index) and the product catalog are refreshed every
+    time.  The book is every account already mirrored plus those resolved
+    from *email_domains*; only accounts new to the book or older than
+    ``MIRROR_MAX_AGE_HOURS`` are re-fetched (all of them with *full*), with
+    one query per table per batch.
+
+    Returns counts: domains, accounts (in the book) and fetched.
+    """
+    rows = _query(_DOMAIN_ACCOUNTS_SQL.format(domain_filter=""), label="resolve_all")
+    domain_map = {row["DOMAIN"]: row["ACCOUNT_ID"] for row in rows}
+    account_index.rebuild(domain_map)
+    local_mirror.store_domains(domain_map)
+
+    global _catalog
+    with _catalog_lock:
+        _catalog = _query(_CATALOG_SQL, label="catalog")
+    local_mirror.store_catalog(_catalog)
+
+    synced = local_mirror.account_sync_times()
+    book = set(synced) | {domain_map[d] for d in {d.lower() for d in email_domains} if domain_map.get(d)}
+    cutoff = time.time() - config.MIRROR_MAX_AGE_HOURS * 3600
+    due = sorted(book if full else {aid for aid in book if synced.get(aid, 0) < cutoff})
+    for start in range(0, len(due), _SYNC_BATCH_SIZE):
+        local_mirror.store_accounts(_fetch_account_data_bulk(due[start:start + _SYNC_BATCH_SIZE]))
+    local_mirror.mark_synced()
+    return {"domains": len(domain_map), "accounts": len(book), "fetched": len(due)}
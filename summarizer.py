@@ -1,15 +1,37 @@
+import hashlib
 import json
-
-import anthropic
+import re
+import threading
 
 import config
+import rate_limit
+import tracing
+
+# Built on first use (importing anthropic and the AWS stack is slow); may be
+# assigned a stand-in beforehand, e.g. by benchmark.py.
+client = None
+_client_lock = threading.Lock()
+
+MODEL_ID = "us.anthropic.claude-opus-4-6-v1"
 
-client = anthropic.AnthropicBedrock(aws_region=config.AWS_REGION)
+# Throttled / overloaded calls are retried by the Bedrock rate limiter.
+_RETRY_STATUS_CODES = {429, 503, 529}
+
+# Rough size of a token, for reserving tokens-per-minute budget up front.
+_CHARS_PER_TOKEN = 4
 
 SYSTEM_PROMPT = """\
 You are a meeting-prep assistant for a customer-facing team. Given structured \
 data about a client account, produce a concise meeting preparation summary.
 
+The input is compact JSON. Tabular sections (lists of records) are encoded as \
+{"columns": [...], "rows": [[...], ...]}, where each row lists its values in \
+column order.
+Sections are ranked most relevant first. An "omitted" object, when present, \
+counts the lower-ranked records left out of each section for length, and an \
+email's "similar_threads" value counts near-duplicate threads folded into it; \
+refer to these only as counts.
+
 Format your output as plain text with EXACTLY the following sections and field \
 labels (use Markdown-style headers). Follow the formatting rules precisely.
 
@@ -46,33 +68,263 @@ meeting context. Focus on actionable items the attendee should raise or prepare
 for during the meeting.
 """
 
+FOLLOWUP_PROMPT = """\
+You are a meeting-prep assistant for a customer-facing team. This client \
+already has an earlier meeting this week, and a full prep summary was written \
+for it. Write a SHORT follow-up prep for the later meeting instead of repeating \
+that summary.
+
+The input is compact JSON with the later meeting, the earlier meeting, and the \
+earlier prep text. Tabular sections are encoded as \
+{"columns": [...], "rows": [[...], ...]}.
+
+Format your output as plain text with EXACTLY the following sections:
+
+## Follow-up Snapshot
+Earlier Meeting: <title and date of the earlier meeting; refer to its prep above>
+Invited Guests: <external attendees of this meeting, separated by semicolons; \
+mark anyone who was not at the earlier meeting as (new)>
+
+## What to Follow Up On
+Provide 2-3 numbered points. Each should have a **bold title** followed by a \
+colon and one sentence, covering what to close out from the earlier meeting's \
+talking points and anything specific to the new attendees.
+"""
+
+DELTA_PROMPT = """\
+You are a meeting-prep assistant for a customer-facing team. A full prep \
+summary was written for this client's previous meeting. Since then some of the \
+account data and email activity changed. Update the summary for the new \
+meeting instead of writing it from scratch.
+
+The input is compact JSON with the new meeting, the previous meeting, the \
+previous prep text ("prior_prep"), the "changes" since then, and the sections \
+to rewrite ("rewrite_sections"). Anything not listed in "changes" is \
+unchanged. In "changes": "threads" lists new email threads and the subjects of \
+threads that are no longer recent ("dropped"); tabular sections list added \
+rows, removed row names and changed fields with before/after values; \
+"overview" and "total_arr" give before/after values (e.g. churn score or ARR \
+moves); "attendees" lists external guests added or removed.
+
+Output ONLY the sections named in rewrite_sections, each starting with its \
+exact header line (e.g. "## Suggested Talking Points") and following the same \
+field labels and formatting as in prior_prep. Keep whatever in the prior text \
+is still accurate, update what the changes affect, and drop references to \
+dropped threads or removed records.
+"""
+
+# Change whenever the prompt text does; part of the summary-cache key.
+PROMPT_VERSION = hashlib.sha256(SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:16]
+FOLLOWUP_PROMPT_VERSION = hashlib.sha256(FOLLOWUP_PROMPT.encode("utf-8")).hexdigest()[:16]
+DELTA_PROMPT_VERSION = hashlib.sha256(DELTA_PROMPT.encode("utf-8")).hexdigest()[:16]
+
+# Bedrock only caches a prompt prefix of at least this many tokens.  Each
+# system prompt above is well short of it (~250-600 tokens) and the user
+# content differs per meeting, so there is no prefix worth a cache_control
+# breakpoint; the cache token counts in the usage stay at zero.
+MIN_CACHEABLE_TOKENS = 4096
+
+_SYSTEM_BLOCKS = [{"type": "text", "text": SYSTEM_PROMPT}]
+_FOLLOWUP_SYSTEM_BLOCKS = [{"type": "text", "text": FOLLOWUP_PROMPT}]
+_DELTA_SYSTEM_BLOCKS = [{"type": "text", "text": DELTA_PROMPT}]
+
+_SECTION_HEADER_RE = re.compile(r"^## +(.+?)\s*$", re.M)
+
+# Token usage of the most recent call made from each thread.
+_local = threading.local()
+
+
+def _table(rows: list[dict]) -> dict:
+    """Encode a list of records as column headers + row arrays."""
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    return {"columns": columns, "rows": [[row.get(c) for c in columns] for row in rows]}
+
+
+def build_payload(
+    meeting: dict,
+    email_threads: list[dict],
+    snowflake_data: dict,
+    omitted: dict[str, int] | None = None,
+) -> dict:
+    """Return the model input for one meeting, with tabular sections compacted.
+
+    *omitted* (section → rows left out, see ``context_builder``) is passed
+    through so the model knows what it is not seeing.
+    """
+    account_data = {
+        key: _table(value) if isinstance(value, list) and value else value
+        for key, value in snowflake_data.items()
+    }
+    payload = {
+        "meeting": {
+            "title": meeting["title"],
+            "start": meeting["start"],
+            "attendees": _table(meeting["attendees"]),
+        },
+        "recent_emails": _table(email_threads) if email_threads else [],
+        "account_data": account_data,
+    }
+    if omitted:
+        payload["omitted"] = omitted
+    return payload
+
+
+def build_followup_payload(meeting: dict, earlier_meeting: dict, earlier_prep: str) -> dict:
+    """Return the model input for a later meeting with an already-prepped client."""
+    return {
+        "meeting": {
+            "title": meeting["title"],
+            "start": meeting["start"],
+            "attendees": _table(meeting["attendees"]),
+        },
+        "earlier_meeting": {
+            "title": earlier_meeting["title"],
+            "start": earlier_meeting["start"],
+            "attendees": _table(earlier_meeting["attendees"]),
+        },
+        "earlier_prep": earlier_prep,
+    }
+
+
+def build_delta_payload(
+    meeting: dict,
+    previous_meeting: dict,
+    prior_prep: str,
+    changes: dict,
+    sections: list[str],
+) -> dict:
+    """Return the model input for updating *sections* of a client's previous prep."""
+    return {
+        "meeting": {
+            "title": meeting["title"],
+            "start": meeting["start"],
+            "attendees": _table(meeting["attendees"]),
+        },
+        "previous_meeting": previous_meeting,
+        "prior_prep": prior_prep,
+        "changes": changes,
+        "rewrite_sections": sections,
+    }
+
+
+def split_sections(text: str) -> dict[str, str]:
+    """Map each ``## <title>`` section of a prep to its text (header included)."""
+    headers = list(_SECTION_HEADER_RE.finditer(text))
+    return {
+        match.group(1): text[match.start():headers[i + 1].start() if i + 1 < len(headers) else len(text)].rstrip()
+        for i, match in enumerate(headers)
+    }
+
+
+def encode_payload(payload: dict) -> str:
+    """Serialize *payload* as compact JSON (no indentation or spacing)."""
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def last_call_usage() -> dict:
+    """Token usage of the last Claude call made from the current thread.
+
+    Keys: input_tokens, output_tokens, cache_read_input_tokens,
+    cache_creation_input_tokens.
+    """
+    return dict(getattr(_local, "usage", {}))
+
 
 def generate_meeting_prep(
     meeting: dict,
     email_threads: list[dict],
     snowflake_data: dict,
+    omitted: dict[str, int] | None = None,
 ) -> str:
     """Call Claude to produce a meeting prep summary for one client meeting."""
 
-    user_content = json.dumps(
-        {
-            "meeting": {
-                "title": meeting["title"],
-                "start": meeting["start"],
-                "attendees": meeting["attendees"],
-            },
-            "recent_emails": email_threads,
-            "account_data": snowflake_data,
-        },
-        indent=2,
-        default=str,
-    )
+    user_content = encode_payload(build_payload(meeting, email_threads, snowflake_data, omitted))
+    return _generate(_SYSTEM_BLOCKS, user_content, max_tokens=4096)
+
 
-    response = client.messages.create(
-        model="us.anthropic.claude-opus-4-6-v1",
-        max_tokens=4096,
-        system=SYSTEM_PROMPT,
-        messages=[{"role": "user", "content": user_content}],
+def generate_followup_prep(meeting: dict, earlier_meeting: dict, earlier_prep: str) -> str:
+    """Call Claude for a short delta prep for a later meeting with the same client."""
+    user_content = encode_payload(build_followup_payload(meeting, earlier_meeting, earlier_prep))
+    return _generate(_FOLLOWUP_SYSTEM_BLOCKS, user_content, max_tokens=1024)
+
+
+def generate_delta_prep(
+    meeting: dict,
+    previous_meeting: dict,
+    prior_prep: str,
+    changes: dict,
+    sections: list[str],
+) -> str:
+    """Call Claude to rewrite only *sections* of *prior_prep* for *changes*.
+
+    Returns the full prep, with every other section copied verbatim.
+    Raises ValueError if the reply is missing a requested section.
+    """
+    user_content = encode_payload(build_delta_payload(meeting, previous_meeting, prior_prep, changes, sections))
+    rewritten = split_sections(_generate(_DELTA_SYSTEM_BLOCKS, user_content, max_tokens=2048))
+    missing = [title for title in sections if title not in rewritten]
+    if missing:
+        raise ValueError(f"Delta prep is missing section(s): {', '.join(missing)}")
+    return "\n\n".join(
+        rewritten[title] if title in sections else text for title, text in split_sections(prior_prep).items()
     )
 
+
+def _generate(system: list[dict], user_content: str, max_tokens: int) -> str:
+    with tracing.span("bedrock.messages", bytes=len(user_content.encode("utf-8"))) as span:
+        response = _create_with_retry(
+            model=MODEL_ID,
+            max_tokens=max_tokens,
+            system=system,
+            messages=[{"role": "user", "content": user_content}],
+        )
+        _local.usage = {
+            "input_tokens": response.usage.input_tokens,
+            "output_tokens": response.usage.output_tokens,
+            "cache_read_input_tokens": getattr(response.usage, "cache_read_input_tokens", None) or 0,
+            "cache_creation_input_tokens": getattr(response.usage, "cache_creation_input_tokens", None) or 0,
+        }
+        span.set(**_local.usage)
+
     return response.content[0].text
+
+
+def warm_up() -> None:
+    """Build the Bedrock client now rather than on the first call."""
+    _get_client()
+
+
+def _get_client():
+    global client
+    with _client_lock:
+        if client is None:
+            import anthropic
+
+            client = anthropic.AnthropicBedrock(aws_region=config.AWS_REGION)
+        return client
+
+
+def _is_throttled(error: BaseException) -> bool:
+    import anthropic
+
+    return isinstance(error, anthropic.APIStatusError) and error.status_code in _RETRY_STATUS_CODES
+
+
+def _create_with_retry(**kwargs):
+    """``client.messages.create`` under the Bedrock rate limiter.
+
+    Reserves one request and the estimated input plus ``max_tokens`` output
+    tokens from the per-minute budgets, then hands back whatever the call
+    did not actually use.
+    """
+    messages = _get_client().messages
+    prompt_chars = sum(len(block["text"]) for block in kwargs["system"]) + sum(
+        len(message["content"]) for message in kwargs["messages"]
+    )
+    reserved = prompt_chars // _CHARS_PER_TOKEN + kwargs["max_tokens"]
+    response = rate_limit.call(
+        "bedrock", lambda: messages.create(**kwargs), _is_throttled, requests=1, tokens=reserved
+    )
+    used = response.usage.input_tokens + response.usage.output_tokens
+    rate_limit.get("bedrock").refund("tokens", reserved - used)
+    return response
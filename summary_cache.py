@@ -0,0 +1,85 @@
+"""Persistent, content-addressed cache of generated meeting-prep summaries.
+
+Entries are keyed by a hash of the normalized model input plus the model id
+and system-prompt version, so a meeting whose calendar entry, email threads
+and account data are unchanged since a previous run skips the Claude call.
+Entries are JSON files under ``SUMMARY_CACHE_DIR``; old entries are evicted
+by age and by total count.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import config
+
+
+def make_key(payload: dict, model_id: str, prompt_version: str) -> str:
+    """Return a stable hash of *payload* for the given model and prompt."""
+    normalized = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.sha256()
+    for part in (model_id, prompt_version, normalized):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _path(key: str) -> str:
+    return os.path.join(config.SUMMARY_CACHE_DIR, f"{key}.json")
+
+
+def get(key: str) -> str | None:
+    """Return the cached summary for *key*, or None if missing or expired."""
+    path = _path(key)
+    try:
+        if time.time() - os.path.getmtime(path) > config.SUMMARY_CACHE_MAX_AGE_DAYS * 86400:
+            return None
+        with open(path) as f:
+            return json.load(f)["summary"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def put(key: str, summary: str) -> None:
+    """Store *summary* under *key* (atomically, safe across threads)."""
+    os.makedirs(config.SUMMARY_CACHE_DIR, exist_ok=True)
+    path = _path(key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"created_at": time.time(), "summary": summary}, f)
+    os.replace(tmp_path, path)
+
+
+def prune() -> int:
+    """Evict expired entries and the oldest ones beyond the size limit.
+
+    Returns the number of entries removed.
+    """
+    try:
+        names = [n for n in os.listdir(config.SUMMARY_CACHE_DIR) if n.endswith(".json")]
+    except FileNotFoundError:
+        return 0
+
+    entries = []
+    for name in names:
+        path = os.path.join(config.SUMMARY_CACHE_DIR, name)
+        try:
+            entries.append((os.path.getmtime(path), path))
+        except OSError:
+            continue
+    entries.sort(reverse=True)  # newest first
+
+    cutoff = time.time() - config.SUMMARY_CACHE_MAX_AGE_DAYS * 86400
+    removed = 0
+    for position, (mtime, path) in enumerate(entries):
+        if mtime < cutoff or position >= config.SUMMARY_CACHE_MAX_ENTRIES:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+    return removed
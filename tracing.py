@@ -0,0 +1,224 @@
+"""Lightweight stage-level tracing for a prep run.
+
+Code wraps interesting work in ``with tracing.span("gmail.list", query=q) as s:``
+and may attach results with ``s.set(rows=len(rows))``.  Spans nest per
+thread, and a span's ``meeting`` attribute is inherited by everything
+started beneath it, so calls made on a meeting's behalf can be attributed
+back to it.
+
+Tracing is off until :func:`enable` is called (``--profile``); while off,
+:func:`span` only hands back a shared no-op object.  :func:`report` prints
+a per-stage and per-meeting breakdown, and :func:`dump_chrome_trace`
+writes the spans in Chrome trace-event format (open in chrome://tracing or
+https://ui.perfetto.dev).
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+_enabled = False
+_spans: list["Span"] = []
+_spans_lock = threading.Lock()
+_ids = itertools.count(1)
+_local = threading.local()
+_origin = time.perf_counter()
+
+
+class Span:
+    __slots__ = ("id", "parent", "name", "thread", "start", "end", "attrs")
+
+    def __init__(self, name: str, parent: "Span | None", attrs: dict):
+        self.id = next(_ids)
+        self.parent = parent
+        self.name = name
+        self.thread = threading.current_thread().name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.end: float | None = None
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    @property
+    def meeting(self) -> str | None:
+        span = self
+        while span is not None:
+            if "meeting" in span.attrs:
+                return span.attrs["meeting"]
+            span = span.parent
+        return None
+
+
+class _NoopSpan:
+    def set(self, **attrs) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def enable() -> None:
+    global _enabled, _origin
+    _enabled = True
+    _origin = time.perf_counter()
+    with _spans_lock:
+        _spans.clear()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time the enclosed block as a span called *name* (e.g. ``"snowflake.query"``)."""
+    if not _enabled:
+        yield _NOOP
+        return
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    # Work handed to another thread has no parent there; callers pass
+    # ``meeting=`` explicitly when it matters.
+    current = Span(name, stack[-1] if stack else None, attrs)
+    stack.append(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        current.end = time.perf_counter()
+        stack.pop()
+        with _spans_lock:
+            _spans.append(current)
+
+
+def spans() -> list[Span]:
+    with _spans_lock:
+        return sorted(_spans, key=lambda s: s.start)
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:,.0f} ms"
+
+
+def _critical_path(recorded: list[Span]) -> list[Span]:
+    """Chain of stage spans that bounded the run's wall time.
+
+    Walks back from the span that finished last, each time stepping to the
+    span that finished last before the current one started.
+    """
+    roots = [s for s in recorded if s.parent is None]
+    outer = max(roots, key=lambda s: s.duration)
+    if all(outer.start <= s.start and s.end <= outer.end for s in roots):
+        # One enclosing run span: look at its stages, plus spans started on
+        # worker threads (which have no parent there)
+        candidates = [s for s in recorded if s.parent is outer] + [s for s in roots if s is not outer]
+    else:
+        candidates = roots
+    if not candidates:
+        return []
+
+    path = [max(candidates, key=lambda s: s.end)]
+    while True:
+        earlier = [s for s in candidates if s.end <= path[-1].start + 1e-6]
+        if not earlier:
+            break
+        path.append(max(earlier, key=lambda s: s.end))
+    return list(reversed(path))
+
+
+def report() -> None:
+    """Print per-stage, per-call-type and per-meeting timing breakdowns."""
+    recorded = spans()
+    if not recorded:
+        print("No spans recorded.")
+        return
+
+    wall = max(s.end for s in recorded) - min(s.start for s in recorded)
+    print(f"\nProfile ({len(recorded)} spans, {_ms(wall)} wall)")
+
+    by_name: dict[str, list[Span]] = {}
+    for s in recorded:
+        by_name.setdefault(s.name, []).append(s)
+
+    print(f"\n  {'call type':<26}{'calls':>7}{'total':>13}{'p50':>11}{'p95':>11}{'max':>11}")
+    for name, group in sorted(by_name.items(), key=lambda kv: -sum(s.duration for s in kv[1])):
+        durations = [s.duration for s in group]
+        print(
+            f"  {name:<26}{len(group):>7}{_ms(sum(durations)):>13}"
+            f"{_ms(_percentile(durations, 50)):>11}{_ms(_percentile(durations, 95)):>11}"
+            f"{_ms(max(durations)):>11}"
+        )
+
+    # Token / row totals where spans recorded them
+    totals: dict[str, int] = {}
+    for s in recorded:
+        for key in ("rows", "bytes", "input_tokens", "output_tokens",
+                    "cache_read_input_tokens", "cache_creation_input_tokens"):
+            if isinstance(s.attrs.get(key), int):
+                totals[key] = totals.get(key, 0) + s.attrs[key]
+    if totals:
+        print("\n  totals: " + ", ".join(f"{k}={v:,}" for k, v in totals.items()))
+
+    per_meeting: dict[str, dict[str, float]] = {}
+    for s in recorded:
+        if "meeting" not in s.attrs:
+            continue
+        stages = per_meeting.setdefault(s.attrs["meeting"], {})
+        stages[s.name] = stages.get(s.name, 0.0) + s.duration
+    if per_meeting:
+        stage_names = sorted({name for stages in per_meeting.values() for name in stages})
+        print(f"\n  {'meeting':<40}" + "".join(f"{n:>14}" for n in stage_names))
+        for meeting, stages in sorted(per_meeting.items(), key=lambda kv: -sum(kv[1].values())):
+            print(f"  {meeting[:38]:<40}" + "".join(f"{_ms(stages.get(n, 0.0)):>14}" for n in stage_names))
+
+    path = _critical_path(recorded)
+    if path:
+        print("\n  critical path:")
+        for s in path:
+            label = f"{s.name} [{s.meeting}]" if s.meeting else s.name
+            print(f"    {_ms(s.start - min(x.start for x in recorded)):>11} +{_ms(s.duration):>10}  {label}")
+
+
+def dump_chrome_trace(path: str) -> None:
+    """Write the recorded spans as a Chrome trace-event JSON file."""
+    recorded = spans()
+    threads = {name: tid for tid, name in enumerate(dict.fromkeys(s.thread for s in recorded), start=1)}
+    events = [
+        {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}}
+        for name, tid in threads.items()
+    ]
+    for s in recorded:
+        events.append({
+            "name": s.name,
+            "cat": s.name.split(".")[0],
+            "ph": "X",
+            "pid": 1,
+            "tid": threads[s.thread],
+            "ts": round((s.start - _origin) * 1e6),
+            "dur": round(s.duration * 1e6),
+            "args": {**s.attrs, "meeting": s.meeting} if s.meeting else dict(s.attrs),
+        })
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)